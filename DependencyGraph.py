@@ -20,13 +20,27 @@
 # THE SOFTWARE.
 
 # import string
+import functools
+import heapq
+import json
+import logging
+import random
 import sys
+import time
+import tracemalloc
 
+from array import array
+from collections import deque
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
 from datetime import timedelta
 
 # Component attributes
 START_KEY   = 'tstart'
 STOP_KEY = 'tstop'
+START_DISTRIBUTION_KEY = 'tstartDistribution'  # Optional; see DependencySchedule
+STOP_DISTRIBUTION_KEY  = 'tstopDistribution'   # Optional; see DependencySchedule
+DEMAND_KEY = 'demand'  # Optional; see DependencyListSchedule
 
 # Dependency attributes
 COMPONENT_KEY = 'component_name'
@@ -38,16 +52,166 @@ BEGIN_STARTUP_KEY  = 'beginStartup'
 END_SHUTDOWN_KEY   = 'endShutdown'
 END_STARTUP_KEY    = 'endStartup'
 
+# Critical path attributes (see set_slackInfoByName()).
+# In each direction, the "slack" of a component is how long it could be delayed
+# without delaying the whole startup/shutdown, and its "free slack" is how long
+# it could be delayed without delaying any other component.
+EARLIEST_BEGIN_SHUTDOWN_KEY = 'earliestBeginShutdown'
+EARLIEST_END_SHUTDOWN_KEY   = 'earliestEndShutdown'
+LATEST_BEGIN_STARTUP_KEY    = 'latestBeginStartup'
+LATEST_END_STARTUP_KEY      = 'latestEndStartup'
+SHUTDOWN_FREE_SLACK_KEY     = 'shutdownFreeSlack'
+SHUTDOWN_SLACK_KEY          = 'shutdownSlack'
+STARTUP_FREE_SLACK_KEY      = 'startupFreeSlack'
+STARTUP_SLACK_KEY           = 'startupSlack'
+
+# Counters of DependencyMetrics
+EDGES_SCANNED       = 'edges_scanned'
+NODES_ENQUEUED      = 'nodes_enqueued'
+BACK_EDGES_REJECTED = 'back_edges_rejected'
+REMEDIATION_PASSES  = 'remediation_passes'
+
+# Messages are logged to this logger, at a level given by get_log_level().
+# Only a NullHandler is added here: where the messages go is up to the
+# application's logging configuration, or to enable_stdout_tracing().
+logger = logging.getLogger('DependencyGraph')
+logger.addHandler(logging.NullHandler())
+
+def get_log_level(min_verbosity):
+    """Return the logging level of the messages shown at the given verbosity:
+    INFO for verbosity 1, and DEBUG for the more detailed ones."""
+    return logging.INFO if min_verbosity <= 1 else logging.DEBUG
+
+def enable_stdout_tracing(level=logging.DEBUG):
+    """Show the messages of graphs with a positive verbosity on stdout,
+    as they were before logging was used.  This is meant for scripts;
+    applications should configure logging themselves instead.
+    Returns the handler added to the logger, so that it can be removed."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+class DependencyMetrics(object):
+    """Records the cost of the phases of the work of a DependencyGraph,
+    and counts some of the steps taken.  The phases are the methods
+    decorated with trace(), such as init_edges() and set_startStopInfoByName(),
+    and are named after them.  A phase that calls another includes its cost.
+    @ivar phasesByName: For each phase, a dictionary with the number of
+        "calls", the "wall_time" and "cpu_time" in seconds, and, if allocations
+        are traced, "peak_allocated", the largest number of bytes allocated
+        by any one call, beyond those allocated when it began.
+    @ivar counters: The number of edges scanned (EDGES_SCANNED), nodes enqueued
+        by the topological sort (NODES_ENQUEUED), cycle-causing edges rejected
+        (BACK_EDGES_REJECTED), and passes of the remediation strategy
+        (REMEDIATION_PASSES)."""
+    def __init__(self, trace_allocations=False, fp=None):
+        """@param: trace_allocations: If True, use tracemalloc (starting it
+            if need be) to record peak allocations.  This slows down every
+            allocation, so unlike the rest of the metrics, it is not cheap.
+        @param: fp: If not None, a file-like object to which a JSON line
+            is written at the end of each phase."""
+        self.trace_allocations = trace_allocations
+        self.fp = fp
+        self.phasesByName = {}
+        self.counters = dict.fromkeys(
+            [EDGES_SCANNED, NODES_ENQUEUED, BACK_EDGES_REJECTED, REMEDIATION_PASSES], 0)
+        self.allocation_stack = []  # [allocated at beginning, peak] for each open phase
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def count(self, counter, n=1):
+        self.counters[counter] += n
+
+    @contextmanager
+    def phase(self, name):
+        """Record the wall time, CPU time and peak allocation of a block
+        of code as a call of the given phase."""
+        if self.trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.allocation_stack:
+                outer = self.allocation_stack[-1]
+                outer[1] = max(outer[1], peak)
+            self.allocation_stack.append([current, current])
+            tracemalloc.reset_peak()
+        wall_begin = time.perf_counter()
+        cpu_begin = time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_begin
+            cpu_time = time.process_time() - cpu_begin
+            info = self.phasesByName.setdefault(
+                name, {'calls': 0, 'wall_time': 0.0, 'cpu_time': 0.0})
+            info['calls'] += 1
+            info['wall_time'] += wall_time
+            info['cpu_time'] += cpu_time
+            if self.trace_allocations:
+                begin, peak = self.allocation_stack.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if self.allocation_stack:
+                    outer = self.allocation_stack[-1]
+                    outer[1] = max(outer[1], peak)
+                tracemalloc.reset_peak()
+                info['peak_allocated'] = max(info.get('peak_allocated', 0), peak - begin)
+            if self.fp is not None:
+                self.fp.write(json.dumps({'phase': name, 'wall_time': wall_time,
+                                          'cpu_time': cpu_time}) + '\n')
+
+    def as_dict(self):
+        """Return a copy of the metrics, as a dictionary with the keys
+        "phases" (see phasesByName) and "counters"."""
+        return {'phases': dict([(name, dict(info))
+                                for name, info in self.phasesByName.items()]),
+                'counters': dict(self.counters)}
+
+    def write_json_lines(self, fp):
+        """Write the metrics to the file-like object "fp" as JSON lines:
+        one for each phase, with its name as "phase", and one for the counters."""
+        for name, info in self.phasesByName.items():
+            line = {'phase': name}
+            line.update(info)
+            fp.write(json.dumps(line) + '\n')
+        fp.write(json.dumps({'counters': self.counters}) + '\n')
+
+class TracedMethod(object):
+    """A method that logs banners on entry and exit, @see trace(),
+    and that is timed as a phase if the instance has DependencyMetrics.
+    Looking up the method returns the undecorated function, bound to the
+    instance, so it costs nothing more.  Instances that do need tracing are
+    given a wrapper instead, when their verbosity or metrics are set;
+    see DependencyGraph.bind_traced_methods()."""
+    def __init__(self, func, trace_level):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.trace_level = trace_level
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self.func
+        return self.func.__get__(obj, objtype)
+
+    def is_needed(self, obj):
+        """Return True if calls on obj must go through traced_call()."""
+        return obj.metrics is not None or obj.verbosity >= self.trace_level
+
+    def traced_call(self, obj, *args, **kwds):
+        obj.vprint(self.trace_level, '%s', '=' * 40)
+        obj.vprint(self.trace_level, 'Entering %s', self.func.__name__)
+        metrics = obj.metrics
+        if metrics is None:
+            result = self.func(obj, *args, **kwds)
+        else:
+            with metrics.phase(self.func.__name__):
+                result = self.func(obj, *args, **kwds)
+        obj.vprint(self.trace_level, 'Exiting %s', self.func.__name__)
+        return result
+
 def trace(trace_level = 1):
     def trace_decorator(func):
-        """Print banners on entry and exit from wrapped function"""
-        def tracedFunc(self, *args, **kwds):
-            self.vprint(trace_level, '=' * 40) 
-            self.vprint(trace_level, 'Entering %s' % func.__name__)
-            result = func(self, *args, **kwds)
-            self.vprint(trace_level, 'Exiting %s' % func.__name__)
-            return result
-        return tracedFunc
+        """Log banners on entry and exit from wrapped method"""
+        return TracedMethod(func, trace_level)
     return trace_decorator
         
 class DependencyDirection(object):
@@ -84,17 +248,507 @@ class DependencyDuplicateDependencyException(Exception):
         if message != "":
             self.message += ': ' + message
 
+class DependencyReadOnlyException(Exception):
+    """Represents an attempt to change a compact DependencyGraph,
+    whose topology is stored in read-only CSR arrays."""
+
+def csr_arrays(num_nodes, source_ids, target_ids):
+    """Return (offsets, targets), the CSR (compressed sparse row) form of the
+    edges source_ids[k] --> target_ids[k].  The targets of node i are
+    targets[offsets[i]:offsets[i + 1]], in the order in which they were given."""
+    offsets = array('i', [0]) * (num_nodes + 1)
+    for source_id in source_ids:
+        offsets[source_id + 1] += 1
+    for i in range(num_nodes):
+        offsets[i + 1] += offsets[i]
+    cursors = offsets[:-1]
+    targets = array('i', [0]) * len(target_ids)
+    for source_id, target_id in zip(source_ids, target_ids):
+        targets[cursors[source_id]] = target_id
+        cursors[source_id] += 1
+    return offsets, targets
+
+class DependencyIndex(object):
+    """Compact, integer-indexed storage for the topology of a DependencyGraph.
+    Component names are mapped once to dense ids (0, 1, ...), and both the
+    forward ("children") and reverse ("parents") adjacency are kept as CSR
+    arrays of type array('i').  The children of the node with id i are
+    child_ids[child_offsets[i]:child_offsets[i + 1]]."""
+    def __init__(self, names, comp_ids=(), req_ids=()):
+        """@param: names: A list of component names.  names[i] has id i.
+        @param: comp_ids: The ids of the components of each dependency.
+        @param: req_ids: The ids of the requirements of each dependency."""
+        self.names = names
+        self.idByName = dict(zip(names, range(len(names))))
+        self.child_offsets, self.child_ids = csr_arrays(
+            len(names), comp_ids, req_ids)
+        self.parent_offsets, self.parent_ids = csr_arrays(
+            len(names), req_ids, comp_ids)
+
+    @classmethod
+    def from_nodes(cls, nodesByName):
+        """Return a DependencyIndex with the topology of the given DependencyNodes.
+        Dependencies on nodes that are not in nodesByName are left out,
+        so this can also be used to index a subgraph."""
+        names = list(nodesByName.keys())
+        idByName = dict(zip(names, range(len(names))))
+        comp_ids = array('i')
+        req_ids = array('i')
+        for comp_id, name in enumerate(names):
+            for req_name in nodesByName[name].children.keys():
+                if req_name in idByName:
+                    comp_ids.append(comp_id)
+                    req_ids.append(idByName[req_name])
+        return cls(names, comp_ids, req_ids)
+
+    def children(self, node_id):
+        return self.child_ids[self.child_offsets[node_id]
+                              :self.child_offsets[node_id + 1]]
+
+    def parents(self, node_id):
+        return self.parent_ids[self.parent_offsets[node_id]
+                               :self.parent_offsets[node_id + 1]]
+
+    def indegree(self, node_id):
+        return self.parent_offsets[node_id + 1] - self.parent_offsets[node_id]
+
+    def outdegree(self, node_id):
+        return self.child_offsets[node_id + 1] - self.child_offsets[node_id]
+
+    def edges(self):
+        """Yield each dependency as a pair (comp_id, req_id)."""
+        child_offsets = self.child_offsets
+        child_ids = self.child_ids
+        for comp_id in range(len(self.names)):
+            for k in range(child_offsets[comp_id], child_offsets[comp_id + 1]):
+                yield comp_id, child_ids[k]
+
+    def num_edges(self):
+        return len(self.child_ids)
+
+    def num_nodes(self):
+        return len(self.names)
+
+    def subgraph(self, node_ids):
+        """Return a DependencyIndex of the given nodes and the dependencies among them.
+        Node node_ids[k] of this DependencyIndex is node k of the result."""
+        local_ids = dict(zip(node_ids, range(len(node_ids))))
+        comp_ids = array('i')
+        req_ids = array('i')
+        for local_comp_id, comp_id in enumerate(node_ids):
+            for req_id in self.children(comp_id):
+                local_req_id = local_ids.get(req_id)
+                if local_req_id is not None:
+                    comp_ids.append(local_comp_id)
+                    req_ids.append(local_req_id)
+        return DependencyIndex([self.names[i] for i in node_ids], comp_ids, req_ids)
+
+    def without_edges(self, rejected_edges):
+        """Return a copy of this DependencyIndex, minus the given (comp_id, req_id) pairs.
+        The ids of the nodes are unchanged."""
+        rejected_edges = set(rejected_edges)
+        comp_ids = array('i')
+        req_ids = array('i')
+        for edge in self.edges():
+            if edge not in rejected_edges:
+                comp_ids.append(edge[0])
+                req_ids.append(edge[1])
+        return DependencyIndex(self.names, comp_ids, req_ids)
+
+def strongly_connected_components(index):
+    """Find the strongly connected components (SCCs) of the graph of a DependencyIndex,
+    using an iterative (non-recursive) version of Tarjan's algorithm.
+    Returns (sccs, scc_ids, postorder), where sccs is a list of lists of node ids,
+    in reverse topological order, scc_ids[i] is the position in sccs of the SCC
+    containing node i, and postorder[i] is the order in which the depth-first
+    search finished with node i."""
+    num_nodes = index.num_nodes()
+    child_offsets = index.child_offsets
+    child_ids = index.child_ids
+    next_edges = child_offsets[:-1]  # The next edge to explore, for each node
+    discovery = array('i', [-1]) * num_nodes
+    lowlinks = array('i', [0]) * num_nodes
+    postorder = array('i', [0]) * num_nodes
+    scc_ids = array('i', [0]) * num_nodes
+    is_on_stack = bytearray(num_nodes)
+    scc_stack = []
+    sccs = []
+    num_discovered = 0
+    num_finished = 0
+    for start_id in range(num_nodes):
+        if discovery[start_id] != -1:
+            continue
+        discovery[start_id] = lowlinks[start_id] = num_discovered
+        num_discovered += 1
+        scc_stack.append(start_id)
+        is_on_stack[start_id] = 1
+        path = [start_id]  # The depth-first search "call stack"
+        while path:
+            node_id = path[-1]
+            k = next_edges[node_id]
+            if k < child_offsets[node_id + 1]:
+                next_edges[node_id] = k + 1
+                child_id = child_ids[k]
+                if discovery[child_id] == -1:
+                    discovery[child_id] = lowlinks[child_id] = num_discovered
+                    num_discovered += 1
+                    scc_stack.append(child_id)
+                    is_on_stack[child_id] = 1
+                    path.append(child_id)
+                elif is_on_stack[child_id] and discovery[child_id] < lowlinks[node_id]:
+                    lowlinks[node_id] = discovery[child_id]
+                continue
+            path.pop()
+            postorder[node_id] = num_finished
+            num_finished += 1
+            if path and lowlinks[node_id] < lowlinks[path[-1]]:
+                lowlinks[path[-1]] = lowlinks[node_id]
+            if lowlinks[node_id] == discovery[node_id]:
+                scc = []
+                while True:
+                    member_id = scc_stack.pop()
+                    is_on_stack[member_id] = 0
+                    scc_ids[member_id] = len(sccs)
+                    scc.append(member_id)
+                    if member_id == node_id:
+                        break
+                sccs.append(scc)
+    return sccs, scc_ids, postorder
+
+def reorder_for_dependency(comp, req, positions, tsorted,
+                           get_children, get_parents, max_visits=None):
+    """Update a topological order so that it respects the new edge comp --> req,
+    using the online algorithm of Pearce and Kelly.  Only the nodes whose positions
+    lie between those of req and comp are searched and reordered.
+    @param: positions: positions[x] is the position of node x in tsorted.
+    @param: tsorted: A topological order of the graph, without the new edge.
+    @param: get_children, get_parents: Functions that return the neighbors of a node.
+    @param: max_visits: If not None, give up after visiting this many nodes.
+    Returns False, leaving the order unchanged, if the new edge would close a cycle,
+    or if the search gave up.  Otherwise returns True."""
+    lower = positions[req]
+    upper = positions[comp]
+    if lower > upper:
+        return True
+    if comp == req:
+        return False
+    # Forward search from req, for nodes that must stay after comp
+    forward = [req]
+    seen = set(forward)
+    stack = [req]
+    while stack:
+        node = stack.pop()
+        for child in get_children(node):
+            if child == comp:
+                return False
+            if child not in seen and positions[child] < upper:
+                seen.add(child)
+                forward.append(child)
+                stack.append(child)
+        if max_visits is not None and len(seen) > max_visits:
+            return False
+    # Backward search from comp, for nodes that must stay before req
+    backward = [comp]
+    seen = set(backward)
+    stack = [comp]
+    while stack:
+        node = stack.pop()
+        for parent in get_parents(node):
+            if parent not in seen and positions[parent] > lower:
+                seen.add(parent)
+                backward.append(parent)
+                stack.append(parent)
+        if max_visits is not None and len(seen) + len(forward) > max_visits:
+            return False
+    moved = sorted(backward, key=lambda node: positions[node]) \
+            + sorted(forward, key=lambda node: positions[node])
+    slots = sorted([positions[node] for node in moved])
+    for node, slot in zip(moved, slots):
+        positions[node] = slot
+        tsorted[slot] = node
+    return True
+
+class BackEdgeRemediation(object):
+    """The default cycle remediation strategy.  Only edges within a strongly
+    connected component are considered, and of those, only the back-edges of
+    the depth-first search are rejected: the edges to a node that finished no
+    earlier than the component.  This takes time linear in V+E."""
+    def rejected_edges(self, index):
+        """Return a list of (comp_id, req_id) pairs whose removal from the graph
+        of a DependencyIndex makes it acyclic."""
+        sccs, scc_ids, postorder = strongly_connected_components(index)
+        result = []
+        for scc in sccs:
+            for comp_id in scc:
+                for req_id in index.children(comp_id):
+                    if (scc_ids[req_id] == scc_ids[comp_id]
+                            and postorder[req_id] >= postorder[comp_id]):
+                        result.append((comp_id, req_id))
+        return result
+
+class EadesLinSmythRemediation(object):
+    """A cycle remediation strategy that usually rejects fewer edges than
+    BackEdgeRemediation.  The nodes of each strongly connected component are
+    ordered with the feedback arc set heuristic of Eades, Lin and Smyth, and
+    the edges that point backward in that order are rejected.  Then a local
+    search puts back each rejected edge that does not close a cycle, keeping
+    the order topological with reorder_for_dependency().
+    The ordering takes time linear in V+E; each attempt to put an edge back
+    visits at most max_reinsertion_visits nodes."""
+    def __init__(self, max_reinsertion_visits=100):
+        """@param: max_reinsertion_visits: The search budget of each attempt
+            to put back a rejected edge.  If 0, no edges are put back."""
+        self.max_reinsertion_visits = max_reinsertion_visits
+
+    def rejected_edges(self, index):
+        """Return a list of (comp_id, req_id) pairs whose removal from the graph
+        of a DependencyIndex makes it acyclic."""
+        sccs, scc_ids, _ = strongly_connected_components(index)
+        result = []
+        for scc in sccs:
+            if len(scc) > 1:
+                result.extend(self.rejected_edges_in_scc(index, scc, scc_ids))
+            elif scc[0] in index.children(scc[0]):
+                result.append((scc[0], scc[0]))
+        return result
+
+    def rejected_edges_in_scc(self, index, scc, scc_ids):
+        local_ids = dict(zip(scc, range(len(scc))))
+        children = [[] for _ in scc]
+        parents = [[] for _ in scc]
+        self_loops = []
+        for comp_id in scc:
+            for req_id in index.children(comp_id):
+                if req_id == comp_id:
+                    self_loops.append((comp_id, req_id))
+                elif scc_ids[req_id] == scc_ids[comp_id]:
+                    children[local_ids[comp_id]].append(local_ids[req_id])
+                    parents[local_ids[req_id]].append(local_ids[comp_id])
+        tsorted = self.order(children, parents)
+        positions = [0] * len(scc)
+        for position, node in enumerate(tsorted):
+            positions[node] = position
+        kept_children = [[] for _ in scc]
+        kept_parents = [[] for _ in scc]
+        rejected = []
+        for comp in range(len(scc)):
+            for req in children[comp]:
+                if positions[comp] < positions[req]:
+                    kept_children[comp].append(req)
+                    kept_parents[req].append(comp)
+                else:
+                    rejected.append((comp, req))
+        if self.max_reinsertion_visits:
+            # Try the edges that span the fewest nodes first.
+            rejected.sort(key=lambda edge: positions[edge[0]] - positions[edge[1]])
+            still_rejected = []
+            for comp, req in rejected:
+                if reorder_for_dependency(comp, req, positions, tsorted,
+                                          kept_children.__getitem__,
+                                          kept_parents.__getitem__,
+                                          self.max_reinsertion_visits):
+                    kept_children[comp].append(req)
+                    kept_parents[req].append(comp)
+                else:
+                    still_rejected.append((comp, req))
+            rejected = still_rejected
+        return self_loops + [(scc[comp], scc[req]) for comp, req in rejected]
+
+    def order(self, children, parents):
+        """Return the Eades-Lin-Smyth ordering of the nodes 0, 1, ..., n-1.
+        Sinks are moved to the end and sources to the start, and otherwise the
+        node with the largest outdegree minus indegree is moved to the start.
+        Nodes are kept in buckets by that difference, so this takes linear time.
+        (The buckets are dictionaries rather than sets, since popping from a
+        set that has had many removals is slow.)"""
+        num_nodes = len(children)
+        outdegrees = [len(node_children) for node_children in children]
+        indegrees = [len(node_parents) for node_parents in parents]
+        is_removed = bytearray(num_nodes)
+        buckets = {}
+        for node in range(num_nodes):
+            buckets.setdefault(outdegrees[node] - indegrees[node], {})[node] = None
+        max_delta = max(buckets) if buckets else 0
+        sinks = [node for node in range(num_nodes) if outdegrees[node] == 0]
+        sources = [node for node in range(num_nodes) if indegrees[node] == 0]
+        left = []
+        right = []
+        while len(left) + len(right) < num_nodes:
+            if sinks:
+                node = sinks.pop()
+                if is_removed[node]:
+                    continue
+                right.append(node)
+            elif sources:
+                node = sources.pop()
+                if is_removed[node]:
+                    continue
+                left.append(node)
+            else:
+                while not buckets.get(max_delta):
+                    max_delta -= 1
+                node = buckets[max_delta].popitem()[0]
+                left.append(node)
+            # Remove the node, and update the buckets of its neighbors.
+            is_removed[node] = 1
+            buckets[outdegrees[node] - indegrees[node]].pop(node, None)
+            for child in children[node]:
+                if not is_removed[child]:
+                    delta = outdegrees[child] - indegrees[child]
+                    del buckets[delta][child]
+                    indegrees[child] -= 1
+                    buckets.setdefault(delta + 1, {})[child] = None
+                    max_delta = max(max_delta, delta + 1)
+                    if indegrees[child] == 0:
+                        sources.append(child)
+            for parent in parents[node]:
+                if not is_removed[parent]:
+                    delta = outdegrees[parent] - indegrees[parent]
+                    del buckets[delta][parent]
+                    outdegrees[parent] -= 1
+                    buckets.setdefault(delta - 1, {})[parent] = None
+                    if outdegrees[parent] == 0:
+                        sinks.append(parent)
+        return left + right[::-1]
+
+# Graphs with at most this many nodes get a BitsetReachability index,
+#   which uses up to MAX_BITSET_NODES**2 / 8 bytes.  Larger ones get a GrailReachability.
+MAX_BITSET_NODES = 8192
+
+class BitsetReachability(object):
+    """Answers "can node u reach node v?" for an acyclic DependencyIndex in
+    constant time, with the full transitive closure: each node has a bitset
+    (a Python int) of the nodes that it can reach, including itself."""
+    def __init__(self, index, tsorted_ids):
+        """@param: tsorted_ids: The node ids, in topological order."""
+        reach = [0] * index.num_nodes()
+        for node_id in reversed(tsorted_ids):
+            bits = 1 << node_id
+            for child_id in index.children(node_id):
+                bits |= reach[child_id]
+            reach[node_id] = bits
+        self.reach = reach
+
+    def reaches(self, source_id, target_id):
+        return (self.reach[source_id] >> target_id) & 1 == 1
+
+class GrailReachability(object):
+    """Answers "can node u reach node v?" for an acyclic DependencyIndex with
+    GRAIL interval labels (Yildirim, Chaoji and Zaki, 2010), which take
+    O(num_labels * V) memory.  Each label comes from a depth-first traversal:
+    a node's interval is [lowest post-order rank below it, its own rank], and
+    if u reaches v, then v's interval lies within u's.  Most negative queries
+    are thus answered in constant time, by the labels or by the topological
+    order.  Conversely, if v's rank lies within the ranks of u's subtree of
+    a depth-first traversal tree, then u reaches v.  The remaining queries
+    are answered by a depth-first search that is pruned by the same tests."""
+    def __init__(self, index, tsorted_ids, num_labels=3, seed=0):
+        """@param: tsorted_ids: The node ids, in topological order.
+        @param: num_labels: The number of traversals, each with a different
+            order of the roots and children.  More labels prune more queries.
+        @param: seed: The seed for the random order of the roots."""
+        self.index = index
+        self.positions = array('i', [0]) * index.num_nodes()
+        for position, node_id in enumerate(tsorted_ids):
+            self.positions[node_id] = position
+        rng = random.Random(seed)
+        roots = [node_id for node_id in tsorted_ids if index.indegree(node_id) == 0]
+        self.labels = []
+        for k in range(num_labels):
+            rng.shuffle(roots)
+            ranks, tree_lows = self.get_postorder_ranks(roots, is_reversed=(k % 2 == 1))
+            lows = array('i', tree_lows)
+            for node_id in reversed(tsorted_ids):
+                for child_id in index.children(node_id):
+                    if lows[child_id] < lows[node_id]:
+                        lows[node_id] = lows[child_id]
+            self.labels.append((lows, ranks, tree_lows))
+
+    def get_postorder_ranks(self, roots, is_reversed):
+        """Return (ranks, tree_lows): the post-order ranks of a depth-first
+        traversal from the roots, visiting the children in CSR order, or in
+        reverse order, and the lowest rank in the traversal subtree of each node.
+        The ranks in a subtree are consecutive."""
+        index = self.index
+        ranks = array('i', [-1]) * index.num_nodes()
+        tree_lows = array('i', [-1]) * index.num_nodes()
+        is_visited = bytearray(index.num_nodes())
+        next_rank = 0
+        for root_id in roots:
+            is_visited[root_id] = 1
+            tree_lows[root_id] = next_rank
+            stack = [(root_id, iter(self.ordered_children(root_id, is_reversed)))]
+            while stack:
+                node_id, child_iter = stack[-1]
+                for child_id in child_iter:
+                    if not is_visited[child_id]:
+                        is_visited[child_id] = 1
+                        tree_lows[child_id] = next_rank
+                        stack.append((child_id,
+                                      iter(self.ordered_children(child_id, is_reversed))))
+                        break
+                else:
+                    stack.pop()
+                    ranks[node_id] = next_rank
+                    next_rank += 1
+        return ranks, tree_lows
+
+    def ordered_children(self, node_id, is_reversed):
+        children = self.index.children(node_id)
+        return reversed(children) if is_reversed else children
+
+    def may_reach(self, source_id, target_id):
+        """Return False if source_id certainly cannot reach target_id."""
+        if self.positions[source_id] > self.positions[target_id]:
+            return False
+        for lows, ranks, _ in self.labels:
+            if lows[target_id] < lows[source_id] or ranks[target_id] > ranks[source_id]:
+                return False
+        return True
+
+    def must_reach(self, source_id, target_id):
+        """Return True if target_id is in a traversal subtree of source_id."""
+        for _, ranks, tree_lows in self.labels:
+            if tree_lows[source_id] <= ranks[target_id] <= ranks[source_id]:
+                return True
+        return False
+
+    def reaches(self, source_id, target_id):
+        if source_id == target_id:
+            return True
+        if not self.may_reach(source_id, target_id):
+            return False
+        if self.must_reach(source_id, target_id):
+            return True
+        is_visited = set([source_id])
+        stack = [source_id]
+        while stack:
+            for child_id in self.index.children(stack.pop()):
+                if child_id in is_visited or not self.may_reach(child_id, target_id):
+                    continue
+                if self.must_reach(child_id, target_id):
+                    return True
+                is_visited.add(child_id)
+                stack.append(child_id)
+        return False
+
 class DependencyGraph(object):
     """Represents a dependency graph, with components indexed by name (a string).
     The storage of "roots", "leaves", and a tsorted list of node names
     allows traversal either down or up the dependency tree.
+    If the graph is "compact", the topology is only stored in a DependencyIndex,
+    and nodesByName, rootsByName, leavesByName and start_tsorted_names are
+    read-only, name-based views of that index.
     """
     @trace(1)
     def __init__(self,
                  components=None,
                  dependencies=None,
                  is_strict=True,
-                 verbosity=0):
+                 verbosity=0,
+                 is_compact=False,
+                 remediation=None,
+                 metrics=None):
         """@param: components: A dictionary of nodes, indexed by name,
             with start and stop times given as additional attributes,
             using keys START_KEY and STOP_KEY.
@@ -105,33 +759,54 @@ class DependencyGraph(object):
             Otherwise, enough dependencies are "rejected" until the graph is acyclic.
         @param: verbosity: A non-negative integer that controls the level of verbosity
             of the DependencyGraph functions.
+        @param: is_compact: If True, the topology is stored in integer-indexed
+            CSR arrays (see DependencyIndex), rather than in per-node dictionaries.
+            This uses far less memory for large graphs, but the graph is read-only.
+        @param: remediation: The strategy used to choose the dependencies that are
+            rejected when is_strict is False.  Defaults to BackEdgeRemediation().
+            The strategy is an object whose rejected_edges() method is passed a
+            DependencyIndex, and returns a list of (comp_id, req_id) pairs.
+        @param: metrics: A DependencyMetrics in which to record the cost of
+            building and scheduling the graph, or None.
         @throws DependencyCycleException
         @throws ValueError"""
+        self.is_compact = is_compact
+        self.index = None  # Only used by compact graphs
         self.nodesByName = {}
         self.rootsByName = {}
         self.leavesByName = {}
         self.startStopInfoByName = {}
+        self.scheduledDirections = set()  # Directions kept up to date in startStopInfoByName
+        self.slackDirections = set()  # Directions whose slack in startStopInfoByName is current
+        self.readyTimesByDirection = {}  # Memoized by ready_time()
         self.start_tsorted_names = []
+        self.tsortedPositionByName = None  # Built on demand by tsorted_positions()
+        self.reachability = None  # Built on demand by get_reachability()
         self.rejected_dependencies = []  # For remediation of cycles
+        self.remediation = remediation or BackEdgeRemediation()
+        self.remediation_stats = {}
         self.is_strict = is_strict
-        self.verbosity = verbosity
+        self._metrics = metrics
+        self._verbosity = verbosity
+        self.bind_traced_methods()
         
         if not components and not dependencies:
             pass
         self.init_nodes(components)
-        self.vprint(2, 'Number of nodes = %d' % len(self.nodesByName))
+        self.vprint(2, 'Number of nodes = %d', len(self.nodesByName))
         self.vprint_nodes(2)
 
         self.init_edges(dependencies)
-        self.vprint(2, 'Number of edges = %d' % self.num_edges())
-        self.vprint_edges(2)
+        if self.is_traced(2):  # num_edges() takes linear time
+            self.vprint(2, 'Number of edges = %d', self.num_edges())
+            self.vprint_edges(2)
         self.init_check_for_cycles()
-        if self.rejected_dependencies and verbosity >= 1:
-            self.vprint(2, 'Number of edges after removing cycles = %d'
-                        % self.num_edges())
+        if self.rejected_dependencies and self.is_traced(2):
+            self.vprint(2, 'Number of edges after removing cycles = %d',
+                        self.num_edges())
             self.vprint_edges(2)
-        if verbosity > 10:
-            print(self.xml_str(2))
+        if self.is_traced(11):
+            self.vprint(11, '\n%s', self.xml_str(2))
             
     def __repr__(self):
         """Return an XML element containing the id of the object.  See xml_str()."""
@@ -147,7 +822,10 @@ class DependencyGraph(object):
         
     def add_node(self, name, attributes):
         """Add a DependencyNode to this DependencyGraph.
-        @throws ValueError if a node name is duplicated.  (Note: This currently cannot happen.)"""
+        @throws ValueError if a node name is duplicated.  (Note: This currently cannot happen.)
+        @throws DependencyReadOnlyException if the graph is compact."""
+        if self.is_compact:
+            raise DependencyReadOnlyException('Compact DependencyGraphs are read-only')
         if name in self.nodesByName.keys():
             raise ValueError('Attempt to duplicate component identifier "%s"'
                              % name)
@@ -155,12 +833,104 @@ class DependencyGraph(object):
         self.nodesByName[name] = node
         return node
 
+    def add_component(self, name, attributes):
+        """Add a component, without dependencies, to an initialized DependencyGraph.
+        It becomes both a root and a leaf, and is appended to start_tsorted_names.
+        @throws ValueError if a node name is duplicated.
+        @throws DependencyReadOnlyException if the graph is compact."""
+        node = self.add_node(name, attributes)
+        self.rootsByName[name] = node
+        self.leavesByName[name] = node
+        self.start_tsorted_names.append(name)
+        self.reachability = None
+        if self.tsortedPositionByName is not None:
+            self.tsortedPositionByName[name] = len(self.start_tsorted_names) - 1
+        self.update_startStopInfoByName([name])
+        return node
+
+    def add_dependency(self, comp_name, req_name):
+        """Add the dependency comp_name --> req_name to an initialized DependencyGraph,
+        keeping start_tsorted_names a valid topological order.
+        This uses the online algorithm of Pearce and Kelly (see reorder_for_dependency()),
+        which only searches and reorders the nodes between req_name and comp_name.
+        If the dependency would create a cycle, then a DependencyCycleException is
+        thrown if self.is_strict is True, and otherwise the dependency is rejected.
+        Returns True if the dependency was added, and False if it was rejected.
+        @throws DependencyCycleException
+        @throws DependencyDuplicateDependencyException
+        @throws DependencyReadOnlyException if the graph is compact.
+        @throws ValueError"""
+        if self.is_compact:
+            raise DependencyReadOnlyException('Compact DependencyGraphs are read-only')
+        if comp_name not in self.nodesByName:
+            raise ValueError('Dependency has unknown component ("%s")'
+                             % comp_name)
+        if req_name not in self.nodesByName:
+            raise ValueError('Dependecy on unknown component ("%s")'
+                             % req_name)
+        comp = self.nodesByName[comp_name]
+        req = self.nodesByName[req_name]
+        if req_name in comp.children:
+            raise DependencyDuplicateDependencyException(
+                '(' + comp_name + ' --> ' + req_name + ')'
+                )
+        nodesByName = self.nodesByName
+        if not reorder_for_dependency(comp_name, req_name,
+                                      self.tsorted_positions(),
+                                      self.start_tsorted_names,
+                                      lambda name: nodesByName[name].children,
+                                      lambda name: nodesByName[name].parents):
+            if self.is_strict:
+                raise DependencyCycleException(
+                    'Dependency would create a cycle: {} --> {}'.format(
+                        comp_name, req_name))
+            self.vprint(1, 'Rejecting cycle-causing edge: %s -> %s',
+                        comp_name, req_name)
+            self.rejected_dependencies.append((comp_name, req_name))
+            if self.metrics is not None:
+                self.metrics.count(BACK_EDGES_REJECTED)
+            return False
+        # Link parent and child
+        comp.children[req_name] = req
+        req.parents[comp_name] = comp
+        self.reachability = None
+        self.leavesByName.pop(comp_name, None)
+        self.rootsByName.pop(req_name, None)
+        self.update_startStopInfoByName([comp_name, req_name])
+        return True
+
+    def remove_dependency(self, comp_name, req_name):
+        """Remove the dependency comp_name --> req_name from an initialized DependencyGraph.
+        Removing a dependency cannot invalidate start_tsorted_names.
+        @throws DependencyReadOnlyException if the graph is compact.
+        @throws ValueError if there is no such dependency."""
+        if self.is_compact:
+            raise DependencyReadOnlyException('Compact DependencyGraphs are read-only')
+        comp = self.nodesByName.get(comp_name)
+        if comp is None or req_name not in comp.children:
+            raise ValueError('Unknown dependency ({} --> {})'.format(
+                comp_name, req_name))
+        # Unlink parent and child
+        req = comp.children.pop(req_name)
+        del req.parents[comp_name]
+        self.reachability = None
+        if not comp.children:
+            self.leavesByName[comp_name] = comp
+        if not req.parents:
+            self.rootsByName[req_name] = req
+        self.update_startStopInfoByName([comp_name, req_name])
+
     @trace(1)
     def init_check_for_cycles(self):
         """Calls the function init_check_for_cycles_graph() for each root node.
         Detects and removes cycles if self.is_strict == False.
+        The cycle-causing edges are found in a single pass over the strongly
+        connected components of the nodes not reached from the roots.
         This function also sets the attribute tsorted_node_names.
         @throws DependencyCycleException"""
+        if self.is_compact:
+            return self.init_check_for_cycles_compact()
+        num_rejected = len(self.rejected_dependencies)
         roots = list(self.rootsByName.values())
         # roots = sorted(roots)
         nodeColorByName = {}
@@ -170,48 +940,132 @@ class DependencyGraph(object):
             (name, len(node.parents.keys()))
             for name, node in self.nodesByName.items()
             ])
-        for root in roots:
-            self.init_check_for_cycles_roots([root], nodeColorByName, indegreeByName)
+        self.init_check_for_cycles_roots(roots, nodeColorByName, indegreeByName)
         unvisited_node_names = [name for name in self.nodesByName.keys()
                                 if nodeColorByName[name] == DependencyColor.WHITE]
-        self.vprint(1, 'Number of unvisited nodes='
-                    + str(len(unvisited_node_names)))
+        self.vprint(1, 'Number of unvisited nodes=%d', len(unvisited_node_names))
         if unvisited_node_names:
             if self.is_strict:
                 raise DependencyCycleException(
                     'One or more cycles exist among the following nodes: '
                         + str(unvisited_node_names))
-            else:  # Remove incoming edges to remove cycle
-                while len(unvisited_node_names) > 0:
-                    unvisited_node_name = unvisited_node_names.pop()
-                    unvisited_node = self.nodesByName[unvisited_node_name]
-                    parent_names = unvisited_node.parents.keys()
-                    for parent_name in list(parent_names):
-                        del unvisited_node.parents[parent_name]
-                        del self.nodesByName[parent_name].children[unvisited_node_name]
-                        self.vprint(1, 'Removing cycle-causing edge: {} -> {}'.format(
-                            parent_name, unvisited_node_name))
-                        self.rejected_dependencies.append(
-                            (parent_name, unvisited_node_name))
-                    self.vprint(1, 'Adding root node "%s"'
-                                % str(unvisited_node_name))
-                    self.rootsByName[unvisited_node_name] = unvisited_node
-                    self.init_check_for_cycles_roots(
-                        [self.nodesByName[unvisited_node_name]],
-                        nodeColorByName,
-                        indegreeByName
-                        )
-                    unvisited_node_names = [
-                        name for name in self.nodesByName.keys()
-                        if nodeColorByName[name] == DependencyColor.WHITE
-                        ]
+            else:  # Remove cycle-causing edges among the unvisited nodes
+                index = DependencyIndex.from_nodes(dict(
+                    [(name, self.nodesByName[name]) for name in unvisited_node_names]
+                    ))
+                for comp_id, req_id in self.remediate_cycles(index):
+                    comp_name = index.names[comp_id]
+                    req_name = index.names[req_id]
+                    del self.nodesByName[comp_name].children[req_name]
+                    del self.nodesByName[req_name].parents[comp_name]
+                    self.vprint(1, 'Removing cycle-causing edge: %s -> %s',
+                                comp_name, req_name)
+                    self.rejected_dependencies.append((comp_name, req_name))
+                    indegreeByName[req_name] -= 1
+                roots = [self.nodesByName[name] for name in unvisited_node_names
+                         if indegreeByName[name] == 0]
+                for root in roots:
+                    if not root.parents:
+                        self.vprint(1, 'Adding root node "%s"', root.name)
+                        self.rootsByName[root.name] = root
+                self.init_check_for_cycles_roots(roots, nodeColorByName, indegreeByName)
         leaf_names = self.leavesByName.keys()
         # leaf_names = sorted(leaf_names)
-        self.vprint(2, 'Leaf nodes: ' + ', '.join(leaf_names))
+        if self.is_traced(2):
+            self.vprint(2, 'Leaf nodes: %s', ', '.join(leaf_names))
         self.leavesByName = dict(
                 [(leaf_name, leaf) for leaf_name, leaf in self.nodesByName.items()
                     if not leaf.children]
             )
+        if self.metrics is not None:
+            self.metrics.count(BACK_EDGES_REJECTED,
+                               len(self.rejected_dependencies) - num_rejected)
+
+    @trace(1)
+    def init_check_for_cycles_compact(self):
+        """The counterpart of init_check_for_cycles() for compact graphs.
+        Runs a topological sort on the integer ids of the DependencyIndex,
+        using the tsorted list of ids itself as the queue of nodes to visit.
+        If cycles are found and is_strict is False, the rejected edges are
+        removed from the index before the sort resumes, so that they are not
+        counted again when their component is visited.
+        @throws DependencyCycleException"""
+        index = self.index
+        num_edges = index.num_edges()
+        num_nodes = index.num_nodes()
+        parent_offsets = index.parent_offsets
+        indegrees = array('i', [parent_offsets[i + 1] - parent_offsets[i]
+                                for i in range(num_nodes)])
+        is_visited = bytearray(num_nodes)
+        tsorted_ids = array('i', [i for i in range(num_nodes)
+                                  if indegrees[i] == 0])
+        for root_id in tsorted_ids:
+            is_visited[root_id] = 1
+        rejected_edges = []
+        head = 0
+        while True:
+            while head < len(tsorted_ids):
+                comp_id = tsorted_ids[head]
+                head += 1
+                for req_id in index.children(comp_id):
+                    if not is_visited[req_id]:
+                        indegrees[req_id] -= 1
+                        if indegrees[req_id] == 0:
+                            is_visited[req_id] = 1
+                            tsorted_ids.append(req_id)
+            if len(tsorted_ids) == num_nodes:
+                break
+            unvisited_ids = [i for i in range(num_nodes) if not is_visited[i]]
+            if self.is_strict or rejected_edges:
+                # With rejected_edges, the remediation left a cycle behind.
+                raise DependencyCycleException(
+                    'One or more cycles exist among the following nodes: '
+                        + str([index.names[i] for i in unvisited_ids]))
+            # Remove cycle-causing edges among the unvisited nodes
+            for local_comp_id, local_req_id in self.remediate_cycles(
+                    index.subgraph(unvisited_ids)):
+                comp_id = unvisited_ids[local_comp_id]
+                req_id = unvisited_ids[local_req_id]
+                self.vprint(1, 'Removing cycle-causing edge: %s -> %s',
+                            index.names[comp_id], index.names[req_id])
+                rejected_edges.append((comp_id, req_id))
+                indegrees[req_id] -= 1
+            index = index.without_edges(rejected_edges)
+            for node_id in unvisited_ids:
+                if indegrees[node_id] == 0:
+                    is_visited[node_id] = 1
+                    tsorted_ids.append(node_id)
+        if rejected_edges:
+            self.rejected_dependencies.extend(
+                [(index.names[comp_id], index.names[req_id])
+                 for comp_id, req_id in rejected_edges])
+            self.set_index(index)
+        self.start_tsorted_names = CompactNameSequence(self.index, tsorted_ids)
+        if self.metrics is not None:
+            # Every node is eventually dequeued, and its children scanned.
+            self.metrics.count(EDGES_SCANNED, num_edges)
+            self.metrics.count(NODES_ENQUEUED, len(tsorted_ids))
+            self.metrics.count(BACK_EDGES_REJECTED, len(rejected_edges))
+
+    def remediate_cycles(self, index):
+        """Return the (comp_id, req_id) pairs that the remediation strategy rejects
+        to make the graph of the given DependencyIndex acyclic, and record in
+        remediation_stats how many edges that saves compared with BackEdgeRemediation."""
+        rejected_edges = self.remediation.rejected_edges(index)
+        if self.metrics is not None:
+            self.metrics.count(REMEDIATION_PASSES)
+        if isinstance(self.remediation, BackEdgeRemediation):
+            num_back_edges = len(rejected_edges)
+        else:
+            num_back_edges = len(BackEdgeRemediation().rejected_edges(index))
+        self.remediation_stats = {
+            'strategy': type(self.remediation).__name__,
+            'num_rejected': len(rejected_edges),
+            'num_rejected_by_back_edges': num_back_edges,
+            'num_saved': num_back_edges - len(rejected_edges),
+            }
+        self.vprint(1, 'Remediation stats: %s', self.remediation_stats)
+        return rejected_edges
 
     @trace(3)  # Higher min_verbosity because this is called for each node
     def init_check_for_cycles_roots(self, roots, nodeColorByName, indegreeByName):
@@ -219,13 +1073,18 @@ class DependencyGraph(object):
         Uses graph coloring (white, gray, black) to trace node state,
         and the dictionary instance indegreeByName
         to track when all parents of a node have been inspected.
+        The nodes that are ready to be visited are kept in a deque, so that
+        each is added and removed in constant time.
         @throws DependencyCycleException"""
+        num_tsorted = len(self.start_tsorted_names)
+        num_rejected = len(self.rejected_dependencies)
         for root in roots:
             nodeColorByName[root.name] = DependencyColor.GRAY
-            self.vprint(2, 'Appending %s to the tsorted list of node names' % root.name)
+            self.vprint(2, 'Appending %s to the tsorted list of node names', root.name)
             self.start_tsorted_names.append(root.name)
+        roots = deque(roots)
         while roots:
-            root = roots.pop(0)
+            root = roots.popleft()
             nodeColorByName[root.name] = DependencyColor.GRAY
             
             childrenToBeDeletedByName = {}
@@ -240,10 +1099,8 @@ class DependencyGraph(object):
                     if self.is_strict:
                         raise DependencyCycleException('Back-edge found')
                     else:
-                        self.vprint(1,
-                                    'Removed back-edge: "{}" --> "{}"'.format(
-                                    root.name,
-                                    child_name))
+                        self.vprint(1, 'Removed back-edge: "%s" --> "%s"',
+                                    root.name, child_name)
                         childrenToBeDeletedByName[child_name] = child
             for child_name, child in childrenToBeDeletedByName.items():
                 # Unlink parent and child
@@ -251,6 +1108,14 @@ class DependencyGraph(object):
                 del root.children[child_name]
                 self.rejected_dependencies.append((root.name, child_name))
             nodeColorByName[root.name] = DependencyColor.BLACK
+        if self.metrics is not None:
+            # Counted afterwards, so that the loop above costs nothing more.
+            enqueued_names = self.start_tsorted_names[num_tsorted:]
+            self.metrics.count(NODES_ENQUEUED, len(enqueued_names))
+            self.metrics.count(EDGES_SCANNED,
+                               sum([len(self.nodesByName[name].children)
+                                    for name in enqueued_names])
+                               + len(self.rejected_dependencies) - num_rejected)
         
     @trace(1)
     def init_edges(self, dependencies):
@@ -258,6 +1123,9 @@ class DependencyGraph(object):
         Note that this function does not check for cycles.
         That is done by init_check_for_cycles.
         @throws ValueError"""
+        if self.is_compact:
+            return self.init_edges_compact(dependencies)
+        is_traced = self.is_traced(2)
         for dep in dependencies:
             comp_name = dep[COMPONENT_KEY]
             if comp_name not in self.nodesByName.keys():
@@ -274,9 +1142,12 @@ class DependencyGraph(object):
                     '(' + comp_name + ' --> ' + req_name + ')'
                     )
             # Link parent and child
-            self.vprint(2, 'Adding the edge {} -> {}'.format(comp_name, req_name))
+            if is_traced:
+                self.vprint(2, 'Adding the edge %s -> %s', comp_name, req_name)
             comp.children[req_name] = req
             req.parents[comp_name] = comp
+        if self.metrics is not None:
+            self.metrics.count(EDGES_SCANNED, self.num_edges())
     
         root_names = [name for name, node in self.nodesByName.items()
                       if not node.parents]
@@ -286,13 +1157,49 @@ class DependencyGraph(object):
             root_names_string += ', '.join(root_names)
         else:
             root_names_string += 'None'
-        self.vprint(2, 'Initial root nodes: ' + root_names_string)
+        self.vprint(2, 'Initial root nodes: %s', root_names_string)
         for root_name in root_names:
             self.rootsByName[root_name] = self.nodesByName[root_name]
 
+    @trace(1)
+    def init_edges_compact(self, dependencies):
+        """The counterpart of init_edges() for compact graphs.
+        Builds the DependencyIndex in a single pass over the dependencies.
+        @throws ValueError"""
+        idByName = self.index.idByName
+        comp_ids = array('i')
+        req_ids = array('i')
+        for dep in dependencies:
+            comp_name = dep[COMPONENT_KEY]
+            if comp_name not in idByName:
+                raise ValueError('Dependency has unknown component ("%s")'
+                                 % comp_name)
+            req_name = dep[REQUIREMENT_KEY]
+            if req_name not in idByName:
+                raise ValueError('Dependecy on unknown component ("%s")'
+                                 % req_name)
+            comp_ids.append(idByName[comp_name])
+            req_ids.append(idByName[req_name])
+        if self.metrics is not None:
+            self.metrics.count(EDGES_SCANNED, len(comp_ids))
+        index = DependencyIndex(self.index.names, comp_ids, req_ids)
+        for comp_id in range(index.num_nodes()):
+            req_ids = index.children(comp_id)
+            if len(set(req_ids)) != len(req_ids):
+                req_name = next(index.names[req_id] for req_id in req_ids
+                                if req_ids.count(req_id) > 1)
+                raise DependencyDuplicateDependencyException(
+                    '(' + index.names[comp_id] + ' --> ' + req_name + ')'
+                    )
+        self.set_index(index)
+
     @trace(1)
     def init_nodes(self, components):
         """Initialize the nodes of the DependencyGraph.  Called by __init__()."""
+        if self.is_compact:
+            self.attributesByName = components
+            self.set_index(DependencyIndex(list(components.keys())))
+            return
         for name in components.keys():
 ##            # The following exception below can never be thrown,
 ##            # since the "components" argument has unique keys.
@@ -301,6 +1208,8 @@ class DependencyGraph(object):
             self.add_node(name, components[name])
 
     def num_edges(self):
+        if self.is_compact:
+            return self.index.num_edges()
         result = 0
         for name, node in self.nodesByName.items():
             result += len(node.children)
@@ -309,69 +1218,608 @@ class DependencyGraph(object):
     def num_nodes(self):
         return len(self.nodesByName.keys())
 
+    def get_attributes(self, name):
+        """Return the attributes (e.g., START_KEY and STOP_KEY) of the named component.
+        @throws KeyError if there is no such component."""
+        if self.is_compact:
+            return self.attributesByName[name]
+        return self.nodesByName[name].attributes
+
+    def get_index(self):
+        """Return a DependencyIndex with the topology of this DependencyGraph.
+        For a compact graph, this is the graph's own index.  Otherwise it is a
+        snapshot, which is not updated by later calls to add_dependency(), etc."""
+        if self.is_compact:
+            return self.index
+        return DependencyIndex.from_nodes(self.nodesByName)
+
+    def get_tsorted_ids(self, index):
+        """Return start_tsorted_names, as the ids of the given DependencyIndex,
+        which is returned by get_index()."""
+        tsorted_ids = getattr(self.start_tsorted_names, 'ids', None)
+        if tsorted_ids is None:
+            tsorted_ids = [index.idByName[name] for name in self.start_tsorted_names]
+        return tsorted_ids
+
+    def get_redundant_dependencies(self):
+        """Return the list of the dependencies (comp_name, req_name) that are
+        implied by others, such as a --> c, given a --> b and b --> c.
+        The components are visited in reverse topological order, and the
+        children of each one in topological order, keeping a bitset of the
+        nodes reached through the children kept so far: a child that is
+        already in it is redundant.  The bitset of a node is only kept until
+        all its parents have been visited, and bit k stands for the node at
+        topological position V - 1 - k, so the bitsets reaching few nodes
+        late in the order stay short."""
+        index = self.get_index()
+        tsorted_ids = self.get_tsorted_ids(index)
+        num_nodes = index.num_nodes()
+        bit_numbers = array('i', [0]) * num_nodes
+        for position, node_id in enumerate(tsorted_ids):
+            bit_numbers[node_id] = num_nodes - 1 - position
+        reach = [0] * num_nodes
+        num_unvisited_parents = [index.indegree(node_id) for node_id in range(num_nodes)]
+        redundant_dependencies = []
+        for node_id in reversed(tsorted_ids):
+            covered = 0
+            # Children earlier in the order have higher bit numbers.
+            child_ids = sorted(index.children(node_id),
+                               key=bit_numbers.__getitem__, reverse=True)
+            for child_id in child_ids:
+                if (covered >> bit_numbers[child_id]) & 1:
+                    redundant_dependencies.append((index.names[node_id],
+                                                   index.names[child_id]))
+                else:
+                    covered |= reach[child_id]
+                num_unvisited_parents[child_id] -= 1
+                if num_unvisited_parents[child_id] == 0:
+                    reach[child_id] = 0
+            reach[node_id] = covered | (1 << bit_numbers[node_id])
+        redundant_dependencies.reverse()
+        return redundant_dependencies
+
     @trace(2)
-    def set_startStopInfoByName(self,
-                                dependency_direction=DependencyDirection.STARTUP):
-        """Determines the times that the components (nodes) in the DependencyGraph
-        can be started/stopped, relative to an arbitrary starting/stopping time,
-        while respecting dependencies of components on others.
+    def transitive_reduction(self):
+        """Return a new DependencyGraph with the same components, and the fewest
+        dependencies that have the same transitive closure as this one's, i.e.,
+        without the dependencies returned by get_redundant_dependencies().
+        Its startup and shutdown schedules are identical to this one's.
+        It has the same is_strict, verbosity, is_compact and remediation settings,
+        but no metrics: its construction is recorded in this graph's metrics,
+        if any, as a single transitive_reduction phase."""
+        index = self.get_index()
+        redundant_dependencies = set(self.get_redundant_dependencies())
+        names = index.names
+        components = dict([(name, self.get_attributes(name)) for name in names])
+        dependencies = ({COMPONENT_KEY: names[comp_id], REQUIREMENT_KEY: names[req_id]}
+                        for comp_id, req_id in index.edges()
+                        if (names[comp_id], names[req_id]) not in redundant_dependencies)
+        return DependencyGraph(components, dependencies,
+                               is_strict=self.is_strict,
+                               verbosity=self.verbosity,
+                               is_compact=self.is_compact,
+                               remediation=self.remediation)
+
+    def get_reachability(self):
+        """Return (index, reachability), where index is the DependencyIndex
+        returned by get_index(), and reachability is a BitsetReachability or
+        a GrailReachability for it, depending on the size of the graph.
+        They are built on the first call, and rebuilt after the graph changes."""
+        if self.reachability is None:
+            index = self.get_index()
+            tsorted_ids = self.get_tsorted_ids(index)
+            if index.num_nodes() <= MAX_BITSET_NODES:
+                self.reachability = (index, BitsetReachability(index, tsorted_ids))
+            else:
+                self.reachability = (index, GrailReachability(index, tsorted_ids))
+        return self.reachability
+
+    def requires(self, comp_name, req_name):
+        """Return True if comp_name depends on req_name, directly or indirectly.
+        @throws KeyError if there is no such component."""
+        index, reachability = self.get_reachability()
+        return comp_name != req_name and reachability.reaches(
+            index.idByName[comp_name], index.idByName[req_name])
+
+    def tsorted_positions(self):
+        """Return a dictionary of the positions of the nodes in start_tsorted_names,
+        indexed by name.  It is built when first needed, and kept up to date
+        by add_component() and add_dependency()."""
+        if self.tsortedPositionByName is None:
+            self.tsortedPositionByName = dict(
+                zip(self.start_tsorted_names, range(len(self.start_tsorted_names))))
+        return self.tsortedPositionByName
+
+    def set_index(self, index):
+        """Make the given DependencyIndex the topology of this compact DependencyGraph,
+        and update the name-based views of it."""
+        self.index = index
+        self.nodesByName = CompactNodesByName(self, range(index.num_nodes()))
+        self.rootsByName = CompactNodesByName(
+            self,
+            array('i', [i for i in range(index.num_nodes()) if index.indegree(i) == 0]),
+            contains=lambda node_id: index.indegree(node_id) == 0)
+        self.leavesByName = CompactNodesByName(
+            self,
+            array('i', [i for i in range(index.num_nodes()) if index.outdegree(i) == 0]),
+            contains=lambda node_id: index.outdegree(node_id) == 0)
+
+    def get_schedule_strategy(self, dependency_direction):
+        """Return a dictionary that describes how the start/stop times are
+        computed when traversing the DependencyGraph in the given direction.
         @throws ValueError"""
-        dg_strategy = {}        
+        dg_strategy = {'dependency_direction': dependency_direction}
         if dependency_direction == DependencyDirection.STARTUP:
             # Traverse down the dependency graph,\
             #   basing beginning of startup on the end of startup of other components.
             dg_strategy['tsorted_names'] = self.start_tsorted_names
             dg_strategy['get_parents']   = lambda node: node.parents
+            dg_strategy['get_children']  = lambda node: node.children
             dg_strategy['REF_KEY']       = END_STARTUP_KEY
             dg_strategy['ref_time_extremum'] = max
-        else:
+            # Used by set_slackInfoByName()
+            dg_strategy['sign']          = 1
+            dg_strategy['WAIT_KEY']      = BEGIN_STARTUP_KEY
+            dg_strategy['DURATION_KEY']  = START_KEY
+            dg_strategy['LATE_WAIT_KEY'] = LATEST_BEGIN_STARTUP_KEY
+            dg_strategy['LATE_REF_KEY']  = LATEST_END_STARTUP_KEY
+            dg_strategy['SLACK_KEY']     = STARTUP_SLACK_KEY
+            dg_strategy['FREE_SLACK_KEY'] = STARTUP_FREE_SLACK_KEY
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
             # Traverse up the dependency graph,
             #   basing end of shutdown on the beginning of shutdown of other components.
             dg_strategy['tsorted_names'] = reversed(self.start_tsorted_names)
             dg_strategy['get_parents']   = lambda node: node.children
+            dg_strategy['get_children']  = lambda node: node.parents
             dg_strategy['REF_KEY']       = BEGIN_SHUTDOWN_KEY
             dg_strategy['ref_time_extremum'] = min
+            # Used by set_slackInfoByName(), which negates shutdown times,
+            #   so that "late" times are then the earliest ones.
+            dg_strategy['sign']          = -1
+            dg_strategy['WAIT_KEY']      = END_SHUTDOWN_KEY
+            dg_strategy['DURATION_KEY']  = STOP_KEY
+            dg_strategy['LATE_WAIT_KEY'] = EARLIEST_END_SHUTDOWN_KEY
+            dg_strategy['LATE_REF_KEY']  = EARLIEST_BEGIN_SHUTDOWN_KEY
+            dg_strategy['SLACK_KEY']     = SHUTDOWN_SLACK_KEY
+            dg_strategy['FREE_SLACK_KEY'] = SHUTDOWN_FREE_SLACK_KEY
+        else:
+            raise ValueError('Unknown DependencyDirection value, %s'
+                             % dependency_direction)
+        return dg_strategy
 
-        for name in dg_strategy['tsorted_names']:
-            if name not in self.startStopInfoByName.keys():
-                self.startStopInfoByName[name] = {}
-            parent_names = dg_strategy['get_parents'](self.nodesByName[name]).keys()
+    @trace(2)
+    def set_startStopInfoByName(self,
+                                dependency_direction=DependencyDirection.STARTUP):
+        """Determines the times that the components (nodes) in the DependencyGraph
+        can be started/stopped, relative to an arbitrary starting/stopping time,
+        while respecting dependencies of components on others.
+        Once this has been called for a direction, the times for that direction
+        are kept up to date by update_startStopInfoByName().
+        @throws ValueError"""
+        if self.is_compact:
+            self.set_startStopInfoByName_compact(dependency_direction)
+        else:
+            dg_strategy = self.get_schedule_strategy(dependency_direction)
+            for name in dg_strategy['tsorted_names']:
+                self.set_startStopInfo(name, dg_strategy)
+        if self.metrics is not None:
+            self.metrics.count(EDGES_SCANNED, self.num_edges())
+        self.scheduledDirections.add(dependency_direction)
+        self.slackDirections.discard(dependency_direction)
+
+    def get_waited_for_names(self, target_names, dependency_direction):
+        """Return the names of the given components and of all the components
+        that they wait for (directly or indirectly) in the given direction,
+        in an order in which each component follows those it waits for.
+        This is a depth-first search from the targets, without recursion,
+        so it only visits the returned components and their dependencies.
+        @throws KeyError if there is no such component.
+        @throws ValueError"""
+        get_parents = self.get_schedule_strategy(dependency_direction)['get_parents']
+        nodesByName = self.nodesByName
+        visited_names = set()
+        ordered_names = []
+        for target_name in target_names:
+            if target_name in visited_names:
+                continue
+            visited_names.add(target_name)
+            stack = [(target_name, iter(get_parents(nodesByName[target_name])))]
+            while stack:
+                name, parent_iter = stack[-1]
+                for parent_name in parent_iter:
+                    if parent_name not in visited_names:
+                        visited_names.add(parent_name)
+                        stack.append((parent_name,
+                                      iter(get_parents(nodesByName[parent_name]))))
+                        break
+                else:
+                    stack.pop()
+                    ordered_names.append(name)  # After all that it waits for
+        return ordered_names
+
+    def set_startStopInfoByName_partial(self, target_names,
+                                        dependency_direction=DependencyDirection.STARTUP):
+        """Like set_startStopInfoByName(), but only for the given components
+        and those that they wait for (see get_waited_for_names()), so the work
+        is proportional to the size of that closure, not of the whole graph.
+        Since the components of the closure wait for no others, their times are
+        the same as in a full schedule.  The times of other components are left
+        as they were, so the direction is not marked as scheduled.
+        Returns the names of the components scheduled, in the order scheduled.
+        @throws KeyError if there is no such component.
+        @throws ValueError"""
+        dg_strategy = self.get_schedule_strategy(dependency_direction)
+        ordered_names = self.get_waited_for_names(target_names, dependency_direction)
+        for name in ordered_names:
+            self.set_startStopInfo(name, dg_strategy)
+        return ordered_names
+
+    def set_startStopInfo(self, name, dg_strategy):
+        """Determines the times that one component can be started/stopped,
+        based on the times of the components that it waits for.
+        Returns True if the reference time, which the components waiting for
+        this one are based on, has changed."""
+        info = self.startStopInfoByName.setdefault(name, {})
+        old_reference_time = info.get(dg_strategy['REF_KEY'])
+        node = self.nodesByName[name]
+        parent_names = dg_strategy['get_parents'](node).keys()
+        reference_time = timedelta(minutes=0)
+        if parent_names:
+            reference_time = dg_strategy['ref_time_extremum'](
+                [self.startStopInfoByName[parent_name][dg_strategy['REF_KEY']]
+                 for parent_name in parent_names])
+        if dg_strategy['dependency_direction'] == DependencyDirection.STARTUP:
+            info.update({
+                BEGIN_STARTUP_KEY  : reference_time,
+                END_STARTUP_KEY    : reference_time + node.attributes[START_KEY]
+                })
+        else:
+            info.update({
+                BEGIN_SHUTDOWN_KEY : reference_time - node.attributes[STOP_KEY],
+                END_SHUTDOWN_KEY   : reference_time
+                })
+        return info[dg_strategy['REF_KEY']] != old_reference_time
+
+    def set_component_times(self, name, start_time=None, stop_time=None):
+        """Change the startup and/or shutdown duration (START_KEY, STOP_KEY)
+        of a component, and update the start/stop times that depend on it.
+        @throws KeyError if there is no such component."""
+        attributes = self.nodesByName[name].attributes
+        if start_time is not None:
+            attributes[START_KEY] = start_time
+        if stop_time is not None:
+            attributes[STOP_KEY] = stop_time
+        return self.update_startStopInfoByName([name])
+
+    def update_startStopInfoByName(self, names):
+        """Incrementally update the start/stop times, for each direction for which
+        set_startStopInfoByName() has been called, after the durations or the
+        dependencies of the named components have changed.
+        Only the components that wait (directly or indirectly) for the named ones
+        are revisited, in topological order, and the search stops at each
+        component whose reference time did not change.
+        Returns the number of components whose times were recomputed."""
+        self.invalidate_ready_times(names)
+        if not self.scheduledDirections:
+            return 0
+        self.slackDirections.clear()
+        positions = self.tsorted_positions()
+        num_recomputed = 0
+        for dependency_direction in sorted(self.scheduledDirections):
+            dg_strategy = self.get_schedule_strategy(dependency_direction)
+            sign = 1 if dependency_direction == DependencyDirection.STARTUP else -1
+            queued_names = set(names)
+            heap = [(sign * positions[name], name) for name in queued_names]
+            heapq.heapify(heap)
+            while heap:
+                _, name = heapq.heappop(heap)
+                num_recomputed += 1
+                if not self.set_startStopInfo(name, dg_strategy):
+                    continue
+                for child_name in dg_strategy['get_children'](self.nodesByName[name]):
+                    if child_name not in queued_names:
+                        queued_names.add(child_name)
+                        heapq.heappush(heap, (sign * positions[child_name], child_name))
+        return num_recomputed
+
+    def ready_time(self, name, dependency_direction=DependencyDirection.STARTUP):
+        """Return the reference time of one component: for startup, the time
+        at which it has started (END_STARTUP_KEY), and for shutdown, the time
+        at which it begins to shut down (BEGIN_SHUTDOWN_KEY).
+        If set_startStopInfoByName() has been called for the direction, the time
+        is looked up.  Otherwise, only the components that this one waits for
+        are visited, and their times are memoized for later calls, until
+        update_startStopInfoByName() reports that they may have changed.
+        The recursion is done with an explicit stack, so long chains are fine.
+        @throws KeyError if there is no such component.
+        @throws ValueError"""
+        dg_strategy = self.get_schedule_strategy(dependency_direction)
+        if dependency_direction in self.scheduledDirections:
+            return self.startStopInfoByName[name][dg_strategy['REF_KEY']]
+        readyTimeByName = self.readyTimesByDirection.setdefault(dependency_direction, {})
+        get_parents = dg_strategy['get_parents']
+        sign = dg_strategy['sign']
+        stack = [name]
+        while stack:
+            pending_name = stack[-1]
+            if pending_name in readyTimeByName:
+                stack.pop()
+                continue
+            node = self.nodesByName[pending_name]
+            parent_names = get_parents(node).keys()
+            unknown_names = [parent_name for parent_name in parent_names
+                             if parent_name not in readyTimeByName]
+            if unknown_names:
+                stack.extend(unknown_names)
+                continue
             reference_time = timedelta(minutes=0)
             if parent_names:
-                parent_reference_times = list(map(
-                    lambda parent_name:
-                    self.startStopInfoByName[parent_name][dg_strategy['REF_KEY']],
-                    parent_names
-                    ))
                 reference_time = dg_strategy['ref_time_extremum'](
-                    parent_reference_times,
-                    key=lambda td: td.days + 86400 * td.seconds
-                    )
+                    [readyTimeByName[parent_name] for parent_name in parent_names])
+            readyTimeByName[pending_name] = \
+                reference_time + sign * node.attributes[dg_strategy['DURATION_KEY']]
+            stack.pop()
+        return readyTimeByName[name]
+
+    def invalidate_ready_times(self, names):
+        """Forget the times memoized by ready_time() for the given components,
+        and for those that wait for them.  A component's time is only memoized
+        if the times of all that it waits for are, so the search stops at
+        components without a memoized time."""
+        for dependency_direction, readyTimeByName in self.readyTimesByDirection.items():
+            if not readyTimeByName:
+                continue
+            get_children = self.get_schedule_strategy(dependency_direction)['get_children']
+            frontier = [name for name in names if name in readyTimeByName]
+            while frontier:
+                name = frontier.pop()
+                if readyTimeByName.pop(name, None) is None:
+                    continue
+                frontier.extend([child_name for child_name
+                                 in get_children(self.nodesByName[name])
+                                 if child_name in readyTimeByName])
+
+    @trace(2)
+    def set_slackInfoByName(self, dependency_direction=DependencyDirection.STARTUP):
+        """Add the results of a critical path analysis to startStopInfoByName.
+        For startup, these are the latest times at which each component could
+        begin and end its startup without delaying the whole startup
+        (LATEST_BEGIN_STARTUP_KEY, LATEST_END_STARTUP_KEY), and its slack and
+        free slack (STARTUP_SLACK_KEY, STARTUP_FREE_SLACK_KEY).
+        For shutdown, which already ends each component as late as possible,
+        these are the earliest times instead.  The components with zero slack
+        are the critical ones; see critical_paths().
+        The start/stop times for the direction are computed first, if needed.
+        Unlike those times, the slack is not kept up to date by
+        update_startStopInfoByName(), so call this again after changes.
+        @throws ValueError"""
+        if dependency_direction not in self.scheduledDirections:
+            self.set_startStopInfoByName(dependency_direction)
+        dg_strategy = self.get_schedule_strategy(dependency_direction)
+        sign = dg_strategy['sign']
+        wait_key, ref_key = dg_strategy['WAIT_KEY'], dg_strategy['REF_KEY']
+        late_wait_key = dg_strategy['LATE_WAIT_KEY']
+        tsorted_names = list(dg_strategy['tsorted_names'])
+        # The times are multiplied by sign, so that they are not negative,
+        #   and each component begins its work at its "wait" time.
+        horizon = max([sign * info[ref_key]
+                       for info in self.startStopInfoByName.values()]
+                      or [timedelta(minutes=0)])
+        for name in reversed(tsorted_names):
+            node = self.nodesByName[name]
+            info = self.startStopInfoByName[name]
+            ref_time = sign * info[ref_key]
+            child_names = dg_strategy['get_children'](node).keys()
+            late_ref_time, free_slack = horizon, horizon - ref_time
+            if child_names:
+                child_infos = [self.startStopInfoByName[child_name]
+                               for child_name in child_names]
+                late_ref_time = min([sign * child_info[late_wait_key]
+                                     for child_info in child_infos])
+                free_slack = min([sign * child_info[wait_key]
+                                  for child_info in child_infos]) - ref_time
+            late_wait_time = late_ref_time - node.attributes[dg_strategy['DURATION_KEY']]
+            info.update({
+                late_wait_key                : sign * late_wait_time,
+                dg_strategy['LATE_REF_KEY']  : sign * late_ref_time,
+                dg_strategy['SLACK_KEY']     : late_ref_time - ref_time,
+                dg_strategy['FREE_SLACK_KEY'] : free_slack
+                })
+        self.slackDirections.add(dependency_direction)
+
+    def critical_paths(self, dependency_direction=DependencyDirection.STARTUP):
+        """Yield the critical chains of components for the given direction.
+        Each chain is a list of names, from a component that waits for no other
+        to one that no other waits for, in which every component has zero slack
+        and begins as soon as the previous one is done.  Delaying any component
+        of a critical chain delays the whole startup/shutdown.
+        The number of chains can grow exponentially with the size of the graph,
+        so use e.g. itertools.islice() to bound the number of chains examined.
+        @throws ValueError"""
+        if dependency_direction not in self.slackDirections:
+            self.set_slackInfoByName(dependency_direction)
+        dg_strategy = self.get_schedule_strategy(dependency_direction)
+        get_children = dg_strategy['get_children']
+        info = self.startStopInfoByName
+        zero = timedelta(minutes=0)
+        def get_critical_children(name):
             node = self.nodesByName[name]
+            return [child_name for child_name in get_children(node)
+                    if info[child_name][dg_strategy['SLACK_KEY']] == zero
+                    and info[child_name][dg_strategy['WAIT_KEY']]
+                        == info[name][dg_strategy['REF_KEY']]]
+        for name in dg_strategy['tsorted_names']:
+            node = self.nodesByName[name]
+            if dg_strategy['get_parents'](node) \
+                   or info[name][dg_strategy['SLACK_KEY']] != zero:
+                continue
+            if not get_children(node):
+                yield [name]
+                continue
+            # Depth-first search, without recursion, through the critical children.
+            path = [name]
+            stack = [iter(get_critical_children(name))]
+            while stack:
+                child_name = next(stack[-1], None)
+                if child_name is None:
+                    stack.pop()
+                    path.pop()
+                    continue
+                path.append(child_name)
+                if get_children(self.nodesByName[child_name]):
+                    stack.append(iter(get_critical_children(child_name)))
+                else:
+                    yield list(path)
+                    path.pop()
+
+    def get_dependent_names(self, names):
+        """Return the names of the given components and of all the components
+        that depend on them (directly or indirectly), in topological order.
+        @throws KeyError if there is no such component."""
+        dependent_names = set(names)
+        frontier = deque(dependent_names)
+        while frontier:
+            node = self.nodesByName[frontier.popleft()]
+            for parent_name in node.parents:
+                if parent_name not in dependent_names:
+                    dependent_names.add(parent_name)
+                    frontier.append(parent_name)
+        if len(dependent_names) == len(self.nodesByName):
+            return list(self.start_tsorted_names)
+        positions = self.tsorted_positions()
+        return sorted(dependent_names, key=lambda name: positions[name])
+
+    @trace(2)
+    def restart_subgraph(self, names):
+        """Return a new DependencyGraph holding only the components that must be
+        restarted when the given components change: those components and the
+        ones that depend on them (see get_dependent_names()), with the
+        dependencies among them.  Its startStopInfoByName is filled in for
+        both directions.  The other components keep running throughout.
+        The new graph has no metrics; its construction and scheduling are
+        recorded in this graph's metrics, if any, as a single restart_subgraph phase.
+        @throws KeyError if there is no such component."""
+        restart_names = self.get_dependent_names(names)
+        restart_name_set = set(restart_names)
+        components = dict([(name, self.get_attributes(name)) for name in restart_names])
+        dependencies = [{COMPONENT_KEY: name, REQUIREMENT_KEY: child_name}
+                        for name in restart_names
+                        for child_name in self.nodesByName[name].children
+                        if child_name in restart_name_set]
+        subgraph = DependencyGraph(components, dependencies,
+                                   verbosity=self.verbosity,
+                                   is_compact=self.is_compact)
+        subgraph.set_startStopInfoByName(DependencyDirection.SHUTDOWN)
+        subgraph.set_startStopInfoByName(DependencyDirection.STARTUP)
+        return subgraph
+
+    def plan_restart(self, names):
+        """Return the start/stop times, keyed like startStopInfoByName, of a
+        restart of the given components and those that depend on them
+        (see restart_subgraph()): they are shut down until time zero,
+        and then started up again.  Only these components appear in the plan.
+        @throws KeyError if there is no such component."""
+        return self.restart_subgraph(names).startStopInfoByName
+
+    @trace(2)
+    def set_startStopInfoByName_compact(self,
+                                        dependency_direction=DependencyDirection.STARTUP):
+        """The counterpart of set_startStopInfoByName() for compact graphs.
+        Reference times are kept in a list indexed by node id, rather than
+        being looked up by name.
+        @throws ValueError"""
+        index = self.index
+        tsorted_ids = self.start_tsorted_names.ids
+        if dependency_direction == DependencyDirection.STARTUP:
+            offsets, pred_ids = index.parent_offsets, index.parent_ids
+            duration_key = START_KEY
+            ref_time_extremum = max
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            tsorted_ids = reversed(tsorted_ids)
+            offsets, pred_ids = index.child_offsets, index.child_ids
+            duration_key = STOP_KEY
+            ref_time_extremum = min
+        else:
+            raise ValueError('Unknown DependencyDirection value, %s'
+                             % dependency_direction)
+        zero = timedelta(minutes=0)
+        ref_times = [zero] * index.num_nodes()
+        for node_id in tsorted_ids:
+            name = index.names[node_id]
+            begin, end = offsets[node_id], offsets[node_id + 1]
+            reference_time = zero
+            if begin < end:
+                reference_time = ref_time_extremum(
+                    [ref_times[pred_id] for pred_id in pred_ids[begin:end]])
+            duration = self.attributesByName[name][duration_key]
+            info = self.startStopInfoByName.setdefault(name, {})
             if dependency_direction == DependencyDirection.STARTUP:
-                self.startStopInfoByName[name].update({
+                ref_times[node_id] = reference_time + duration
+                info.update({
                     BEGIN_STARTUP_KEY  : reference_time,
-                    END_STARTUP_KEY    : reference_time + node.attributes[START_KEY]
+                    END_STARTUP_KEY    : ref_times[node_id]
                     })
-            elif dependency_direction == DependencyDirection.SHUTDOWN:
-                self.startStopInfoByName[name].update({
-                    BEGIN_SHUTDOWN_KEY : reference_time - node.attributes[STOP_KEY],
+            else:
+                ref_times[node_id] = reference_time - duration
+                info.update({
+                    BEGIN_SHUTDOWN_KEY : ref_times[node_id],
                     END_SHUTDOWN_KEY   : reference_time
                     })
-            else:
-                raise ValueError('Unknown DependencyDirection value, %s'
-                                 % dependency_direction)
-
-    def vprint(self, min_verbosity, *args, **kwds):
-        # self.verbosity is not yet defined in the annotated copy of __init__.
-        if hasattr(self, 'verbosity') and self.verbosity >= min_verbosity:
-            nspaces = max(0, 2 * (min_verbosity - 1))
-            indent = ' ' * nspaces
-            return print('INFO({}): {}'.format(min_verbosity, indent), *args, **kwds)
+
+    @property
+    def verbosity(self):
+        return self._verbosity
+
+    @verbosity.setter
+    def verbosity(self, verbosity):
+        self._verbosity = verbosity
+        self.bind_traced_methods()
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self._metrics = metrics
+        self.bind_traced_methods()
+
+    def bind_traced_methods(self):
+        """Decide once, rather than on each call, which of the methods decorated
+        with trace() must log banners or record metrics for this graph, given
+        its verbosity and metrics.  Those are shadowed by a wrapper in the
+        instance's dictionary; the others are looked up undecorated."""
+        seen_names = set()
+        for cls in type(self).__mro__:
+            for name, attr in vars(cls).items():
+                if name in seen_names or name.startswith('__'):
+                    continue
+                seen_names.add(name)
+                if not isinstance(attr, TracedMethod):
+                    continue
+                if attr.is_needed(self):
+                    self.__dict__[name] = functools.partial(attr.traced_call, self)
+                else:
+                    self.__dict__.pop(name, None)
+
+    def is_traced(self, min_verbosity):
+        """Return True if messages of the given verbosity are logged:
+        the graph's verbosity must be high enough, and the logger must be
+        enabled for the corresponding level."""
+        return self.verbosity >= min_verbosity \
+            and logger.isEnabledFor(get_log_level(min_verbosity))
+
+    def vprint(self, min_verbosity, msg, *args):
+        """Log msg % args, if is_traced(min_verbosity).  As with logging,
+        the message is only formatted if it is logged."""
+        if self.is_traced(min_verbosity):
+            indent = ' ' * max(0, 2 * (min_verbosity - 1))
+            logger.log(get_log_level(min_verbosity), indent + msg, *args,
+                       extra={'verbosity': min_verbosity})
     
     def vprint_edges(self, min_verbosity, header='Edges: ', sep=", "):
         content = header
-        if self.verbosity >= min_verbosity:
+        if self.is_traced(min_verbosity):
             edge_names = [node.name + ' --> ' + req.name
                           for node in self.nodesByName.values()
                           for req in node.children.values()]
@@ -379,43 +1827,141 @@ class DependencyGraph(object):
                 content += sep.join(edge_names)
             else:
                 content += 'None'
-        return self.vprint(min_verbosity, content)
+        return self.vprint(min_verbosity, '%s', content)
     
     def vprint_nodes(self, min_verbosity, header='Nodes: ', sep=', '):
         content = header
-        if self.verbosity >= min_verbosity:
+        if self.is_traced(min_verbosity):
             if self.nodesByName:
                 node_names = [repr(node) for node in self.nodesByName.values()]
                 # node_names = sorted(node_names)
                 content += sep.join(node_names)
             else:
                 content += 'None'
-        return self.vprint(min_verbosity, content)
+        return self.vprint(min_verbosity, '%s', content)
         
     def xml_str(self,
                 indent=0,
                 roots=None,
                 get_childrenByName=None,
                 get_attrDictByName=lambda name: {},
-                attr_keys=[]):
+                attr_keys=[],
+                dag=False):
         """Return XML showing the DependencyGraph and all its DependencyNodes.
         By default, the graph is shown in top-down order, but that can be overridden
         by use of the "roots" and "get_children" arguments.
         Also, additional DependencyNode attributes can be displayed by use of the
         "get_attrDictByName" and "attr_keys" arguments.
+        By default, a node is shown under each of its parents, so the output
+        can grow exponentially with the depth of the graph.  If "dag" is True,
+        each node is shown once, and is then referred to by a
+        DependencyNodeRef element, whose "ref" attribute is the node's "id".
+        For large graphs, use write_xml(), which does not build the whole string.
         """
+        return ''.join(self.xml_chunks(indent, roots, get_childrenByName,
+                                       get_attrDictByName, attr_keys, dag))
+
+    def xml_chunks(self,
+                   indent=0,
+                   roots=None,
+                   get_childrenByName=None,
+                   get_attrDictByName=lambda name: {},
+                   attr_keys=[],
+                   dag=False):
+        """Generate the XML returned by xml_str(), one line at a time.
+        @see DependencyGraph.xml_str()."""
         if roots == None:
             roots = self.rootsByName.values()
+        written_ids = set() if dag else None
         prefix = " " * indent
-        result = prefix + "<DependencyGraph>\n"
+        yield prefix + "<DependencyGraph>\n"
         # roots = sorted(roots, key=lambda node: node.name)
         for root in roots:
-            result += root.xml_str(indent + 2,
-                                   get_childrenByName=get_childrenByName,
-                                   attr_keys=attr_keys,
-                                   get_attrDictByName=get_attrDictByName)
-        result += prefix + "</DependencyGraph>\n"
-        return result
+            for chunk in root.xml_chunks(indent + 2,
+                                         get_childrenByName=get_childrenByName,
+                                         attr_keys=attr_keys,
+                                         get_attrDictByName=get_attrDictByName,
+                                         written_ids=written_ids):
+                yield chunk
+        yield prefix + "</DependencyGraph>\n"
+
+    def write_xml(self,
+                  fp,
+                  indent=0,
+                  roots=None,
+                  get_childrenByName=None,
+                  get_attrDictByName=lambda name: {},
+                  attr_keys=[],
+                  dag=False):
+        """Write the XML returned by xml_str() to the file-like object "fp",
+        without holding more than one line of it in memory.
+        @see DependencyGraph.xml_str()."""
+        fp.writelines(self.xml_chunks(indent, roots, get_childrenByName,
+                                      get_attrDictByName, attr_keys, dag))
+
+    def json_str(self,
+                 roots=None,
+                 get_childrenByName=None,
+                 get_attrDictByName=lambda name: {},
+                 attr_keys=[]):
+        """Return JSON showing the DependencyGraph and all its DependencyNodes.
+        The result is an object whose "DependencyGraph" member is a list with
+        one object per node reached from "roots", in the order in which
+        xml_str(dag=True) first shows them.  Each object has the "name" and "id"
+        of the node, its attributes named in "attr_keys", and the list of the
+        ids of its "children".  Attribute values that are not JSON types, such
+        as timedeltas, are written as strings.
+        @see DependencyGraph.xml_str()."""
+        return ''.join(self.json_chunks(roots, get_childrenByName,
+                                        get_attrDictByName, attr_keys))
+
+    def json_chunks(self,
+                    roots=None,
+                    get_childrenByName=None,
+                    get_attrDictByName=lambda name: {},
+                    attr_keys=[]):
+        """Generate the JSON returned by json_str(), one node at a time.
+        @see DependencyGraph.json_str()."""
+        if roots == None:
+            roots = self.rootsByName.values()
+        if get_childrenByName == None:
+            get_childrenByName = lambda node: node.children.values()
+        written_ids = set()
+        sep = "\n"
+        yield '{"DependencyGraph": ['
+        # Each entry of the stack is an iterator over the children of a node.
+        stack = [iter(roots)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            if node.xml_id() in written_ids:
+                continue
+            written_ids.add(node.xml_id())
+            children = list(get_childrenByName(node))
+            nodeDict = {'name': node.name, 'id': node.xml_id()}
+            attrDict = get_attrDictByName(node.name)
+            if attrDict:
+                for attr_key in attr_keys:
+                    nodeDict[attr_key] = attrDict[attr_key]
+            nodeDict['children'] = [child.xml_id() for child in children]
+            yield sep + json.dumps(nodeDict, default=str)
+            sep = ",\n"
+            stack.append(iter(children))
+        yield "\n]}\n"
+
+    def write_json(self,
+                   fp,
+                   roots=None,
+                   get_childrenByName=None,
+                   get_attrDictByName=lambda name: {},
+                   attr_keys=[]):
+        """Write the JSON returned by json_str() to the file-like object "fp",
+        without holding more than one node of it in memory.
+        @see DependencyGraph.json_str()."""
+        fp.writelines(self.json_chunks(roots, get_childrenByName,
+                                       get_attrDictByName, attr_keys))
     
 class DependencyNode(object):
     """This class stores the topology of the DependencyGraph
@@ -436,36 +1982,163 @@ class DependencyNode(object):
     def __str__(self):
         return "<DependencyNode name='" + self.name + "'/>\n"  
 
+    def xml_id(self):
+        """Return the value of the "id" attribute used by xml_str()."""
+        return str(id(self))
+
     def xml_str(self,
                 indent=0,
                 get_childrenByName=None,
                 get_attrDictByName=lambda name: {},
                 attr_keys=[]):
         """@see DependencyGraph.xml_str()."""
+        return ''.join(self.xml_chunks(indent, get_childrenByName,
+                                       get_attrDictByName, attr_keys))
+
+    def xml_start_tag(self, indent, has_children, get_attrDictByName, attr_keys):
+        """Return the line that opens this node's element in xml_str(),
+        or the whole element, if it has no children."""
+        result = " " * indent + "<DependencyNode name='" + self.name \
+                 + "' id='" + self.xml_id() + "'"
+        attrDict = get_attrDictByName(self.name)
+        if attrDict:
+            for attr_key in attr_keys:
+                result += " {}='{}' ".format(attr_key, attrDict[attr_key])
+        if has_children:
+            return result + ">\n"
+        return result + "/>\n"
+
+    def xml_ref_tag(self, indent):
+        """Return the element that refers to this node, once it has been shown."""
+        return " " * indent + "<DependencyNodeRef name='" + self.name \
+               + "' ref='" + self.xml_id() + "'/>\n"
+
+    def xml_chunks(self,
+                   indent=0,
+                   get_childrenByName=None,
+                   get_attrDictByName=lambda name: {},
+                   attr_keys=[],
+                   written_ids=None):
+        """Generate the XML returned by xml_str(), one line at a time.
+        An explicit stack of child iterators is used instead of recursion,
+        so deep graphs do not reach the recursion limit.
+        @param: written_ids: If not None, the set of the ids of the nodes
+            already shown, which is updated.  Those nodes are shown as
+            DependencyNodeRef elements.
+        @see DependencyGraph.xml_str()."""
         if get_childrenByName == None:
             get_childrenByName = lambda node: node.children.values()
-        prefix = " " * indent
-        result = prefix + "<DependencyNode name='" + self.name \
-                 + "' id='" + str(id(self)) + "'"
-        if get_attrDictByName(self.name):
-            for attr_key in attr_keys:
-                result += " {}='{}' ".format(
-                    attr_key,
-                    get_attrDictByName(self.name)[attr_key])
-        if get_childrenByName(self):
-            result += ">\n"
-            children = get_childrenByName(self)
-            # children = sorted(get_childrenByName(self), key=lambda node: node.name)
-            for child in children:
-                result += child.xml_str(indent + 2,
-                                        get_childrenByName,
-                                        get_attrDictByName=get_attrDictByName,
-                                        attr_keys=attr_keys)
-            result += prefix + "</DependencyNode>\n"
-        else:
-            result += "/>\n"
-        return result
+        if written_ids is not None:
+            if self.xml_id() in written_ids:
+                yield self.xml_ref_tag(indent)
+                return
+            written_ids.add(self.xml_id())
+        children = get_childrenByName(self)
+        yield self.xml_start_tag(indent, bool(children), get_attrDictByName, attr_keys)
+        if not children:
+            return
+        # Each entry holds a node whose element is open, and its unvisited children.
+        stack = [(indent, iter(children))]
+        while stack:
+            node_indent, child_iter = stack[-1]
+            child = next(child_iter, None)
+            if child is None:
+                stack.pop()
+                yield " " * node_indent + "</DependencyNode>\n"
+                continue
+            if written_ids is not None:
+                if child.xml_id() in written_ids:
+                    yield child.xml_ref_tag(node_indent + 2)
+                    continue
+                written_ids.add(child.xml_id())
+            # children = sorted(get_childrenByName(child), key=lambda node: node.name)
+            children = get_childrenByName(child)
+            yield child.xml_start_tag(node_indent + 2, bool(children),
+                                      get_attrDictByName, attr_keys)
+            if children:
+                stack.append((node_indent + 2, iter(children)))
     
+class CompactDependencyNode(DependencyNode):
+    """A name-based view of one node of a compact DependencyGraph.
+    Instances are created on demand, and their "parents" and "children"
+    are read-only views of the graph's DependencyIndex."""
+    def __init__(self, graph, node_id):
+        self.graph = graph
+        self.node_id = node_id
+        self.name = graph.index.names[node_id]
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactDependencyNode)
+                and self.graph is other.graph and self.node_id == other.node_id)
+
+    def __hash__(self):
+        return hash(self.node_id)
+
+    @property
+    def attributes(self):
+        return self.graph.attributesByName[self.name]
+
+    @property
+    def children(self):
+        return CompactNodesByName(self.graph, self.graph.index.children(self.node_id))
+
+    @property
+    def parents(self):
+        return CompactNodesByName(self.graph, self.graph.index.parents(self.node_id))
+
+    def xml_id(self):
+        """Return the node id, which (unlike the id of this view) is stable."""
+        return str(self.node_id)
+
+class CompactNodesByName(Mapping):
+    """A read-only dictionary of CompactDependencyNodes, indexed by name,
+    for a sequence of node ids of a compact DependencyGraph."""
+    def __init__(self, graph, node_ids, contains=None):
+        """@param: contains: An optional function that tells whether a node id
+            is in node_ids, for when "node_id in node_ids" would be slow."""
+        self.graph = graph
+        self.node_ids = node_ids
+        self.contains = contains
+
+    def __getitem__(self, name):
+        node_id = self.graph.index.idByName.get(name)
+        if node_id is None:
+            raise KeyError(name)
+        if self.contains is not None:
+            if not self.contains(node_id):
+                raise KeyError(name)
+        elif node_id not in self.node_ids:
+            raise KeyError(name)
+        return CompactDependencyNode(self.graph, node_id)
+
+    def __iter__(self):
+        names = self.graph.index.names
+        return (names[node_id] for node_id in self.node_ids)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def values(self):
+        graph = self.graph
+        return [CompactDependencyNode(graph, node_id) for node_id in self.node_ids]
+
+class CompactNameSequence(Sequence):
+    """A read-only list of names, for a sequence of node ids of a DependencyIndex."""
+    def __init__(self, index, ids):
+        self.index = index
+        self.ids = ids
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.index.names[node_id] for node_id in self.ids[i]]
+        return self.index.names[self.ids[i]]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return repr(list(self))
+
 if __name__=='__main__':
     ########################################
     # Dependency dgraph data
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Shows that the construction of a DependencyGraph (including the
+topological sort) takes time linear in the number of edges.
+The graphs are wide and layered, so that the frontier of the topological sort
+holds a large fraction of the nodes at once."""
+
+import argparse
+import gc
+import math
+import time
+
+from DependencyGraph import DependencyGraph
+from DependencyGraphBenchmarks.Generators import layered_graph
+
+DEFAULT_EDGE_COUNTS = [10000, 100000, 1000000, 5000000]
+
+def time_construction(num_edges, is_compact=False):
+    """Return (number of edges, seconds) for the construction of a layered DependencyGraph."""
+    components, dependencies = layered_graph(num_edges)
+    gc.collect()
+    start = time.perf_counter()
+    dgraph = DependencyGraph(components, dependencies(), is_compact=is_compact)
+    elapsed = time.perf_counter() - start
+    return dgraph.num_edges(), elapsed
+
+def scaling_exponent(results):
+    """Return the least-squares slope of log(seconds) against log(edges).
+    A slope near 1.0 means linear scaling; 2.0 would be quadratic."""
+    xs = [math.log(num_edges) for num_edges, _ in results]
+    ys = [math.log(seconds) for _, seconds in results]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    denominator = sum((x - x_mean) ** 2 for x in xs)
+    return numerator / denominator
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--edges', type=int, nargs='+', default=DEFAULT_EDGE_COUNTS,
+                        help='The (approximate) edge counts to time')
+    parser.add_argument('--compact', action='store_true',
+                        help='Use the compact (CSR) DependencyGraph storage')
+    args = parser.parse_args(argv)
+
+    results = []
+    print('{:>10} {:>10} {:>12}'.format('edges', 'seconds', 'usec/edge'))
+    for num_edges in args.edges:
+        num_edges, seconds = time_construction(num_edges, args.compact)
+        results.append((num_edges, seconds))
+        print('{:>10} {:>10.3f} {:>12.3f}'.format(
+            num_edges, seconds, 1e6 * seconds / num_edges))
+    if len(results) > 1:
+        print('Scaling exponent (1.0 is linear): %.2f' % scaling_exponent(results))
+
+if __name__=='__main__':
+    main()
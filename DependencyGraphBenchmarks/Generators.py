@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Seeded generators of synthetic DependencyGraph inputs.
+Each generator takes the (approximate) number of edges wanted and a seed,
+and returns (components, dependencies), where "components" is the dictionary
+passed to DependencyGraph, and "dependencies" is a function that returns a new
+iterator over the dependencies each time it is called.  The dependencies are
+generated lazily where possible, since DependencyGraph only needs to iterate
+over them once.  The same arguments always give the same graph."""
+
+import random
+
+from datetime import timedelta
+
+from DependencyGraph import COMPONENT_KEY, REQUIREMENT_KEY, START_KEY, STOP_KEY
+
+def get_components(names, seed=0, max_seconds=60):
+    """Return a components dictionary for the given names, with random start and
+    stop durations of between 1 and max_seconds seconds."""
+    rng = random.Random(seed)
+    components = {}
+    for name in names:
+        components[name] = {START_KEY: timedelta(seconds=rng.randint(1, max_seconds)),
+                            STOP_KEY: timedelta(seconds=rng.randint(1, max_seconds))}
+    return components
+
+def get_dependency(comp_name, req_name):
+    return {COMPONENT_KEY: comp_name, REQUIREMENT_KEY: req_name}
+
+def random_dag(num_edges, seed=0, degree=4):
+    """A random DAG, in which each node requires "degree" distinct nodes
+    chosen uniformly among those later in a random topological order.
+    The names are shuffled, so that the order is not that of the names."""
+    num_nodes = max(degree + 1, num_edges // degree)
+    ids = list(range(num_nodes))
+    random.Random(seed).shuffle(ids)
+    names = ['n%d' % i for i in ids]
+    def dependencies():
+        rng = random.Random(seed + 1)
+        for i in range(num_nodes - 1):
+            for j in rng.sample(range(i + 1, num_nodes), min(degree, num_nodes - i - 1)):
+                yield get_dependency(names[i], names[j])
+    return get_components(names, seed), dependencies
+
+def layered_graph(num_edges, num_layers=5, degree=4):
+    """Return (components, dependencies) for a layered DAG with about num_edges edges.
+    A single root requires every node of the first layer, and each node requires
+    "degree" nodes of the next layer, so the whole first layer becomes ready at once.
+    The graph is not random, so there is no seed."""
+    width = max(degree, num_edges // (degree * (num_layers - 1) + 1))
+    duration = timedelta(seconds=1)
+    components = dict([('n%d' % i, {START_KEY: duration, STOP_KEY: duration})
+                       for i in range(num_layers * width)])
+    components['root'] = {START_KEY: duration, STOP_KEY: duration}
+    stride = width // degree
+    def dependencies():
+        for j in range(width):
+            yield {COMPONENT_KEY: 'root', REQUIREMENT_KEY: 'n%d' % j}
+        for layer in range(num_layers - 1):
+            for j in range(width):
+                comp_name = 'n%d' % (layer * width + j)
+                for k in range(degree):
+                    req_index = (layer + 1) * width + (j + k * stride) % width
+                    yield {COMPONENT_KEY: comp_name,
+                           REQUIREMENT_KEY: 'n%d' % req_index}
+    return components, dependencies
+
+def microservice_graph(num_edges, seed=0, degree=3, tier_weights=(1, 4, 8, 2)):
+    """A layered graph shaped like a system of microservices: a few gateways
+    require services, which require lower-level services, which require
+    datastores.  Each node requires "degree" distinct nodes chosen at random
+    from the tiers below its own, so dependencies may skip tiers.
+    @param: tier_weights: The relative number of nodes in each tier, top first."""
+    num_nodes = max(2 * degree, num_edges // degree)
+    total_weight = float(sum(tier_weights))
+    tier_sizes = [max(degree, int(num_nodes * weight / total_weight))
+                  for weight in tier_weights]
+    tier_begins = [sum(tier_sizes[:k]) for k in range(len(tier_sizes) + 1)]
+    tier_names = ['gateway', 'service', 'backend', 'datastore']
+    names = []
+    for tier, size in enumerate(tier_sizes):
+        prefix = tier_names[tier] if tier < len(tier_names) else 'tier%d_' % tier
+        names.extend(['%s%d' % (prefix, i) for i in range(size)])
+    def dependencies():
+        rng = random.Random(seed + 1)
+        for tier in range(len(tier_sizes) - 1):
+            lower = range(tier_begins[tier + 1], len(names))
+            for i in range(tier_begins[tier], tier_begins[tier + 1]):
+                for j in rng.sample(lower, min(degree, len(lower))):
+                    yield get_dependency(names[i], names[j])
+    return get_components(names, seed), dependencies
+
+def chain(num_edges, seed=0):
+    """A single chain of num_edges + 1 nodes: the deepest possible graph."""
+    names = ['n%d' % i for i in range(num_edges + 1)]
+    def dependencies():
+        for i in range(num_edges):
+            yield get_dependency(names[i], names[i + 1])
+    return get_components(names, seed), dependencies
+
+def fan_out_star(num_edges, seed=0):
+    """A hub that requires num_edges leaves, which are all ready at once."""
+    names = ['n%d' % i for i in range(num_edges)]
+    def dependencies():
+        for name in names:
+            yield get_dependency('hub', name)
+    return get_components(names + ['hub'], seed), dependencies
+
+def fan_in_star(num_edges, seed=0):
+    """num_edges components that all require the same hub."""
+    names = ['n%d' % i for i in range(num_edges)]
+    def dependencies():
+        for name in names:
+            yield get_dependency(name, 'hub')
+    return get_components(names + ['hub'], seed), dependencies
+
+def nested_diamonds(num_edges, seed=0, width=2):
+    """Diamonds stacked one below the other: the top node of each requires
+    "width" middle nodes, which all require the next top node.  There are
+    width ** depth paths from the first node to the last, so this is the
+    worst case for anything that expands paths (e.g., xml_str(dag=False))."""
+    depth = max(1, num_edges // (2 * width))
+    names = []
+    for level in range(depth):
+        names.append('top%d' % level)
+        names.extend(['mid%d_%d' % (level, k) for k in range(width)])
+    names.append('top%d' % depth)
+    def dependencies():
+        for level in range(depth):
+            for k in range(width):
+                mid_name = 'mid%d_%d' % (level, k)
+                yield get_dependency('top%d' % level, mid_name)
+                yield get_dependency(mid_name, 'top%d' % (level + 1))
+    return get_components(names, seed), dependencies
+
+# The number of paths tried by planted_cycles() for each cycle wanted.
+MAX_ATTEMPTS_PER_CYCLE = 100
+
+def planted_cycles(num_edges, seed=0, degree=4, num_cycles=None, max_cycle_length=8):
+    """A random_dag() with cycles planted in it: for each cycle, a path of up to
+    max_cycle_length edges is followed from a random node, and an edge back
+    from its last node to its first is added.
+    @param: num_cycles: Defaults to one cycle per thousand edges.
+    @throws ValueError if num_cycles distinct back edges are not found within
+        MAX_ATTEMPTS_PER_CYCLE * num_cycles attempts, e.g., because the graph
+        is too small to hold that many cycles."""
+    if num_cycles is None:
+        num_cycles = max(1, num_edges // 1000)
+    components, dag_dependencies = random_dag(num_edges, seed, degree)
+    edges = [(dep[COMPONENT_KEY], dep[REQUIREMENT_KEY]) for dep in dag_dependencies()]
+    childrenByName = {}
+    for comp_name, req_name in edges:
+        childrenByName.setdefault(comp_name, []).append(req_name)
+    rng = random.Random(seed + 2)
+    names = sorted(childrenByName.keys())
+    back_edges = set()
+    for _ in range(MAX_ATTEMPTS_PER_CYCLE * num_cycles):
+        if len(back_edges) >= num_cycles or not names:
+            break
+        first_name = name = rng.choice(names)
+        for _ in range(rng.randint(1, max_cycle_length)):
+            if name not in childrenByName:
+                break
+            name = rng.choice(childrenByName[name])
+        back_edges.add((name, first_name))
+    if len(back_edges) < num_cycles and names:
+        raise ValueError('Could only plant %d of %d cycles in a graph of %d edges'
+                         % (len(back_edges), num_cycles, len(edges)))
+    edges.extend(sorted(back_edges))
+    def dependencies():
+        for comp_name, req_name in edges:
+            yield get_dependency(comp_name, req_name)
+    return components, dependencies
+
+# The generators run by the benchmark Suite, by name.
+GENERATORS = {
+    'random_dag'        : random_dag,
+    'microservices'     : microservice_graph,
+    'chain'             : chain,
+    'fan_out_star'      : fan_out_star,
+    'fan_in_star'       : fan_in_star,
+    'nested_diamonds'   : nested_diamonds,
+    'planted_cycles'    : planted_cycles,
+    }
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Compares the performance of two versions of DependencyGraph.py on the same
+workloads, and reports the regressions.  Each version is given as a copy of
+DependencyGraph.py, a directory that holds one, or a git revision of this
+repository.  Each run times every workload in a fresh Python process that
+imports one of the versions, and the runs of the two versions alternate,
+so that both are exposed to the same drift in the state of the machine.
+For each workload, the ratio of the median times (candidate / baseline) is
+reported, with a bootstrap confidence interval.  A regression is flagged
+when the ratio exceeds 1 + threshold and its confidence interval lies
+entirely above 1.  Everything runs locally, without network access.
+
+Only the operations that every version of DependencyGraph supports are timed:
+strict and non-strict construction, and startup and shutdown scheduling."""
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# This module does not import DependencyGraph itself, except in the worker
+# processes, which import the version that they time.
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_GENERATORS = ['chain', 'fan_out_star', 'microservices', 'nested_diamonds',
+                      'planted_cycles', 'random_dag']
+DEFAULT_EDGE_COUNTS = [10000, 100000]
+OPERATIONS = ['construct_strict', 'construct_non_strict', 'startup', 'shutdown']
+
+# Statuses of a comparison
+REGRESSION   = 'REGRESSION'
+INCONCLUSIVE = 'inconclusive'
+IMPROVEMENT  = 'improvement'
+UNCHANGED    = 'ok'
+
+def time_min(func, repeat):
+    """Return (seconds, result) for the fastest of "repeat" calls of func().
+    Within a process, the fastest call is the one least disturbed by the
+    rest of the machine."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def run_workloads(generator_names, edge_counts, seed, repeat=3):
+    """Time the OPERATIONS on each workload with the DependencyGraph module
+    found first on sys.path, and return {workload: {operation: seconds}},
+    where each workload is named "<generator>/<requested edges>"."""
+    import DependencyGraph
+    from DependencyGraphBenchmarks.Generators import GENERATORS
+    secondsByWorkload = {}
+    for generator_name in generator_names:
+        for num_edges in edge_counts:
+            components, dependencies = GENERATORS[generator_name](num_edges, seed)
+            # Older versions may iterate over the dependencies more than once.
+            dependencies = list(dependencies())
+            seconds = {}
+            def construct_strict():
+                try:
+                    DependencyGraph.DependencyGraph(components, dependencies)
+                except DependencyGraph.DependencyCycleException:
+                    pass
+            seconds['construct_strict'], _ = time_min(construct_strict, repeat)
+            seconds['construct_non_strict'], dgraph = time_min(
+                lambda: DependencyGraph.DependencyGraph(components, dependencies,
+                                                        is_strict=False), repeat)
+            for operation, direction in [
+                    ('startup', DependencyGraph.DependencyDirection.STARTUP),
+                    ('shutdown', DependencyGraph.DependencyDirection.SHUTDOWN)]:
+                seconds[operation], _ = time_min(
+                    lambda: dgraph.set_startStopInfoByName(direction), repeat)
+            secondsByWorkload['%s/%d' % (generator_name, num_edges)] = seconds
+            del dgraph
+    return secondsByWorkload
+
+def get_module_source(version, repository_dir=REPOSITORY_DIR):
+    """Return the source of the DependencyGraph.py given by "version":
+    a path to the file, a directory that holds it, or a git revision.
+    @throws ValueError if there is no such file or revision."""
+    if os.path.isdir(version):
+        version = os.path.join(version, 'DependencyGraph.py')
+    if os.path.isfile(version):
+        with open(version) as fp:
+            return fp.read()
+    try:
+        return subprocess.check_output(
+            ['git', 'show', version + ':DependencyGraph.py'],
+            cwd=repository_dir, stderr=subprocess.PIPE, universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError):
+        raise ValueError('Not a DependencyGraph.py, a directory holding one, '
+                         'or a git revision: "%s"' % version)
+
+class Version(object):
+    """A version of DependencyGraph.py, copied into a directory of its own,
+    so that a worker process can import it ahead of any other."""
+    def __init__(self, label, source):
+        self.label = label
+        self.directory = tempfile.mkdtemp(prefix='DependencyGraph-%s-' % label)
+        with open(os.path.join(self.directory, 'DependencyGraph.py'), 'w') as fp:
+            fp.write(source)
+
+    def run(self, generator_names, edge_counts, seed, repeat=3, cpu=None):
+        """Run the workloads in a new process, and return their timings.
+        @throws subprocess.CalledProcessError if the worker fails."""
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([self.directory, REPOSITORY_DIR])
+        spec = {'generators': generator_names, 'edges': edge_counts,
+                'seed': seed, 'repeat': repeat, 'cpu': cpu}
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--worker', json.dumps(spec)],
+            env=env, cwd=self.directory, universal_newlines=True)
+        return json.loads(output.splitlines()[-1])
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def worker_main(spec_json):
+    spec = json.loads(spec_json)
+    if spec['cpu'] is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, [spec['cpu']])
+    print(json.dumps(run_workloads(spec['generators'], spec['edges'], spec['seed'],
+                                   spec['repeat'])))
+
+def ratio_interval(baseline, candidate, confidence=0.95, num_resamples=2000, seed=0):
+    """Return a bootstrap confidence interval (low, high) for the ratio of
+    the median of the candidate times to the median of the baseline times."""
+    rng = random.Random(seed)
+    ratios = []
+    for _ in range(num_resamples):
+        baseline_median = statistics.median([rng.choice(baseline) for _ in baseline])
+        candidate_median = statistics.median([rng.choice(candidate) for _ in candidate])
+        ratios.append(candidate_median / baseline_median)
+    ratios.sort()
+    low_index = int((1.0 - confidence) / 2 * num_resamples)
+    return ratios[low_index], ratios[num_resamples - 1 - low_index]
+
+def compare(baseline, candidate, threshold=0.1, confidence=0.95, seed=0):
+    """Compare two lists of times, and return a dictionary with their medians,
+    the ratio of the medians, its confidence interval, and a status:
+    REGRESSION if the ratio is above 1 + threshold and the whole interval
+    is above 1, IMPROVEMENT in the opposite case, INCONCLUSIVE if the ratio
+    is beyond the threshold in either direction but the interval includes 1,
+    and UNCHANGED otherwise."""
+    baseline_median = statistics.median(baseline)
+    candidate_median = statistics.median(candidate)
+    ratio = candidate_median / baseline_median
+    low, high = ratio_interval(baseline, candidate, confidence, seed=seed)
+    if ratio > 1 + threshold:
+        status = REGRESSION if low > 1 else INCONCLUSIVE
+    elif ratio < 1 / (1 + threshold):
+        status = IMPROVEMENT if high < 1 else INCONCLUSIVE
+    else:
+        status = UNCHANGED
+    return {'baseline_median': baseline_median, 'candidate_median': candidate_median,
+            'ratio': ratio, 'interval': [low, high], 'status': status}
+
+def run_comparison(baseline, candidate, generator_names, edge_counts, num_runs=10,
+                   num_warmup_runs=1, seed=0, threshold=0.1, confidence=0.95,
+                   repeat=3, cpu=None, progress=None):
+    """Time the workloads num_runs times with each version, alternating between
+    them, after num_warmup_runs runs that are not counted, and compare them.
+    Return {'samples': {label: {workload: {operation: [seconds]}}},
+            'comparisons': {workload: {operation: compare() result}}}.
+    @param: baseline, candidate: Version objects.
+    @param: repeat: The number of times that each operation is timed in each
+        run; the fastest counts as the run's time.
+    @param: progress: If not None, called with a message after each run."""
+    samples = {baseline.label: {}, candidate.label: {}}
+    for run in range(num_warmup_runs + num_runs):
+        # Alternate which version goes first, so that neither always follows the other.
+        versions = [baseline, candidate] if run % 2 == 0 else [candidate, baseline]
+        for version in versions:
+            secondsByWorkload = version.run(generator_names, edge_counts, seed,
+                                            repeat, cpu)
+            if run < num_warmup_runs:
+                continue
+            for workload, seconds in secondsByWorkload.items():
+                for operation, elapsed in seconds.items():
+                    samples[version.label].setdefault(workload, {}) \
+                        .setdefault(operation, []).append(elapsed)
+        if progress is not None:
+            progress('Finished run %d of %d%s' % (
+                run + 1, num_warmup_runs + num_runs,
+                ' (warm-up)' if run < num_warmup_runs else ''))
+    comparisons = {}
+    for workload, timesByOperation in samples[baseline.label].items():
+        for operation, baseline_times in timesByOperation.items():
+            candidate_times = samples[candidate.label][workload][operation]
+            comparisons.setdefault(workload, {})[operation] = compare(
+                baseline_times, candidate_times, threshold, confidence, seed)
+    return {'samples': samples, 'comparisons': comparisons}
+
+def format_report(comparisons, confidence):
+    lines = ['{:<24} {:<20} {:>10} {:>10} {:>7}  {:<17} {}'.format(
+        'workload', 'operation', 'baseline', 'candidate', 'ratio',
+        '%d%% interval' % round(100 * confidence), 'status')]
+    for workload in sorted(comparisons.keys()):
+        for operation in OPERATIONS:
+            result = comparisons[workload][operation]
+            lines.append('{:<24} {:<20} {:>10.4f} {:>10.4f} {:>7.3f}  [{:.3f}, {:.3f}]   {}'.format(
+                workload, operation, result['baseline_median'], result['candidate_median'],
+                result['ratio'], result['interval'][0], result['interval'][1],
+                result['status']))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    """Return 1 if a regression was found, and 0 otherwise."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline',
+                        help='A DependencyGraph.py, a directory holding one, or a git revision')
+    parser.add_argument('candidate', nargs='?', default=REPOSITORY_DIR,
+                        help='As for baseline.  Defaults to the working tree')
+    parser.add_argument('--generators', nargs='+', default=DEFAULT_GENERATORS,
+                        help='The graph generators of the workloads')
+    parser.add_argument('--edges', type=int, nargs='+', default=DEFAULT_EDGE_COUNTS,
+                        help='The (approximate) edge counts of the workloads')
+    parser.add_argument('--runs', type=int, default=10,
+                        help='The number of timed runs of each version')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='The number of runs of each version that are not counted')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='The number of times that each operation is timed in '
+                             'each run; the fastest is kept')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='The relative slowdown that counts as a regression')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='The confidence level of the intervals')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='The seed of the graph generators and of the bootstrap')
+    parser.add_argument('--cpu', type=int, default=None,
+                        help='Pin the worker processes to this CPU, to reduce noise')
+    parser.add_argument('--output', default=None,
+                        help='A JSON file in which to save the samples and comparisons')
+    args = parser.parse_args(argv)
+    if args.runs < 2:
+        parser.error('--runs must be at least 2')
+
+    baseline = Version('baseline', get_module_source(args.baseline))
+    candidate = Version('candidate', get_module_source(args.candidate))
+    try:
+        report = run_comparison(baseline, candidate, args.generators, args.edges,
+                                args.runs, args.warmup, args.seed, args.threshold,
+                                args.confidence, args.repeat, args.cpu,
+                                progress=lambda message: print(message, file=sys.stderr))
+    finally:
+        baseline.remove()
+        candidate.remove()
+    print(format_report(report['comparisons'], args.confidence))
+    if args.output is not None:
+        with open(args.output, 'w') as fp:
+            json.dump(dict(report, arguments=vars(args)), fp, indent=1, sort_keys=True)
+            fp.write('\n')
+    regressions = [(workload, operation)
+                   for workload, resultByOperation in report['comparisons'].items()
+                   for operation, result in resultByOperation.items()
+                   if result['status'] == REGRESSION]
+    if regressions:
+        print('%d regression(s) above %d%%' % (len(regressions), round(100 * args.threshold)))
+        return 1
+    return 0
+
+if __name__=='__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--worker':
+        worker_main(sys.argv[2])
+    else:
+        sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Times the main operations of a DependencyGraph on each of the synthetic
+graphs of Generators, across a range of sizes: strict construction (which
+stops at the first cycle), non-strict construction (which removes cycles),
+startup and shutdown scheduling, and XML and JSON export.  The results are
+saved as JSON, so that runs can be compared."""
+
+import argparse
+import datetime
+import gc
+import json
+import platform
+import sys
+import time
+
+from DependencyGraph import (DependencyCycleException, DependencyDirection,
+                             DependencyGraph, DependencyMetrics)
+from DependencyGraphBenchmarks.Generators import GENERATORS
+
+DEFAULT_EDGE_COUNTS = [1000, 10000, 100000, 1000000, 5000000]
+DEFAULT_MAX_EXPORT_CHARS = 1 << 30
+
+# The timed operations, in the order in which they are run.
+OPERATIONS = ['construct_strict', 'construct_non_strict', 'startup', 'shutdown',
+              'xml_export', 'json_export']
+
+class OutputLimitExceeded(Exception):
+    pass
+
+class CountingSink(object):
+    """A file-like object that only counts the characters written to it.
+    Even with dag=True, the XML of a deep graph is quadratic in its depth,
+    because of the indentation, so the export is given up past max_chars."""
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.num_chars = 0
+
+    def write(self, chunk):
+        self.num_chars += len(chunk)
+        if self.num_chars > self.max_chars:
+            raise OutputLimitExceeded()
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+def time_call(func, repeat=1):
+    """Return (seconds, result) for the fastest of "repeat" calls of func()."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def time_export(write, max_chars, repeat=1):
+    """Return (seconds, number of characters) for write(sink),
+    or (None, None) if the output would exceed max_chars."""
+    def export():
+        sink = CountingSink(max_chars)
+        write(sink)
+        return sink.num_chars
+    try:
+        return time_call(export, repeat)
+    except OutputLimitExceeded:
+        return None, None
+
+def run_benchmark(generator_name, num_edges, seed=0, is_compact=False, repeat=1,
+                  max_export_chars=DEFAULT_MAX_EXPORT_CHARS):
+    """Time the OPERATIONS on the graph of the given generator and size.
+    Return a dictionary, with the timings in seconds under "seconds", and the
+    DependencyMetrics of the non-strict graph under "metrics".  The metrics
+    are collected in a separate, untimed pass, so that their cost is not
+    part of the timings, which can then be compared with older versions."""
+    components, dependencies = GENERATORS[generator_name](num_edges, seed)
+    result = {'generator': generator_name, 'requested_edges': num_edges,
+              'seed': seed, 'is_compact': is_compact}
+    seconds = {}
+    def construct_strict():
+        try:
+            DependencyGraph(components, dependencies(), is_compact=is_compact)
+        except DependencyCycleException:
+            return True
+        return False
+    seconds['construct_strict'], result['has_cycles'] = time_call(construct_strict, repeat)
+    def construct_non_strict():
+        return DependencyGraph(components, dependencies(), is_strict=False,
+                               is_compact=is_compact)
+    seconds['construct_non_strict'], dgraph = time_call(construct_non_strict, repeat)
+    result['num_nodes'] = dgraph.num_nodes()
+    result['num_edges'] = dgraph.num_edges()
+    result['num_rejected'] = len(dgraph.rejected_dependencies)
+    seconds['startup'], _ = time_call(
+        lambda: dgraph.set_startStopInfoByName(DependencyDirection.STARTUP), repeat)
+    seconds['shutdown'], _ = time_call(
+        lambda: dgraph.set_startStopInfoByName(DependencyDirection.SHUTDOWN), repeat)
+    seconds['xml_export'], result['xml_chars'] = time_export(
+        lambda sink: dgraph.write_xml(sink, dag=True), max_export_chars, repeat)
+    seconds['json_export'], result['json_chars'] = time_export(
+        dgraph.write_json, max_export_chars, repeat)
+    result['seconds'] = seconds
+    del dgraph
+    result['metrics'] = get_metrics(components, dependencies, is_compact)
+    return result
+
+def get_metrics(components, dependencies, is_compact=False):
+    """Return the DependencyMetrics, as a dictionary, of the non-strict
+    construction of a graph, and of its startup and shutdown scheduling."""
+    metrics = DependencyMetrics()
+    dgraph = DependencyGraph(components, dependencies(), is_strict=False,
+                             is_compact=is_compact, metrics=metrics)
+    dgraph.set_startStopInfoByName(DependencyDirection.STARTUP)
+    dgraph.set_startStopInfoByName(DependencyDirection.SHUTDOWN)
+    return metrics.as_dict()
+
+def get_environment():
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'started': datetime.datetime.now().isoformat()}
+
+def save_results(path, environment, arguments, results):
+    with open(path, 'w') as fp:
+        json.dump({'environment': environment, 'arguments': arguments,
+                   'results': results}, fp, indent=1, sort_keys=True)
+        fp.write('\n')
+
+def format_seconds(seconds):
+    return '{:>10}'.format('-') if seconds is None else '{:>10.3f}'.format(seconds)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS.keys()),
+                        default=sorted(GENERATORS.keys()),
+                        help='The graph generators to run')
+    parser.add_argument('--edges', type=int, nargs='+', default=DEFAULT_EDGE_COUNTS,
+                        help='The (approximate) edge counts to time')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='The seed of the random generators')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='The number of times that each operation is timed; '
+                             'the fastest is kept')
+    parser.add_argument('--compact', action='store_true',
+                        help='Use the compact (CSR) DependencyGraph storage')
+    parser.add_argument('--max-export-chars', type=int, default=DEFAULT_MAX_EXPORT_CHARS,
+                        help='Give up exports whose output would be longer than this')
+    parser.add_argument('--output', default='DependencyGraphBenchmarks.json',
+                        help='The JSON file in which to save the results')
+    args = parser.parse_args(argv)
+
+    environment = get_environment()
+    results = []
+    print('{:<16} {:>10} '.format('generator', 'edges')
+          + ' '.join(['{:>10}'.format(operation[:10]) for operation in OPERATIONS]))
+    for generator_name in args.generators:
+        for num_edges in args.edges:
+            result = run_benchmark(generator_name, num_edges, args.seed, args.compact,
+                                   args.repeat, args.max_export_chars)
+            results.append(result)
+            print('{:<16} {:>10} '.format(generator_name, result['num_edges'])
+                  + ' '.join([format_seconds(result['seconds'][operation])
+                              for operation in OPERATIONS]))
+            sys.stdout.flush()
+            # Saved after each result, so that a long run can be interrupted.
+            save_results(args.output, environment, vars(args), results)
+    print('Results saved in %s' % args.output)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Benchmarks for DependencyGraph.  Each module can be run as a script, e.g.:
+    python -m DependencyGraphBenchmarks.ConstructionScaling
+    python -m DependencyGraphBenchmarks.Suite --edges 1000 100000 --output results.json
+    python -m DependencyGraphBenchmarks.Regression <baseline revision> [<candidate>]
+The graphs are made by the seeded generators of DependencyGraphBenchmarks.Generators.
+"""
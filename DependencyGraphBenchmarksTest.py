@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import DependencyGraph
+import unittest
+
+from DependencyGraphBenchmarks import Generators, Regression, Suite
+
+class GeneratedGraphs(unittest.TestCase):
+    def test_sizes(self):
+        for name, generator in Generators.GENERATORS.items():
+            components, dependencies = generator(1000, seed=1)
+            dgraph = DependencyGraph.DependencyGraph(components, dependencies(),
+                                                     is_strict=False)
+            self.assertTrue(800 <= dgraph.num_edges() + len(dgraph.rejected_dependencies) <= 1100,
+                            name)
+            self.assertEqual(dgraph.num_nodes(), len(components))
+    def test_seeded(self):
+        for name, generator in Generators.GENERATORS.items():
+            components, dependencies = generator(200, seed=3)
+            same_components, same_dependencies = generator(200, seed=3)
+            self.assertEqual(components, same_components)
+            self.assertEqual(list(dependencies()), list(same_dependencies()))
+            self.assertEqual(list(dependencies()), list(dependencies()))
+    def test_planted_cycles(self):
+        components, dependencies = Generators.planted_cycles(1000, num_cycles=3)
+        self.assertRaises(DependencyGraph.DependencyCycleException,
+                          DependencyGraph.DependencyGraph, components, dependencies())
+        dgraph = DependencyGraph.DependencyGraph(components, dependencies(), is_strict=False)
+        self.assertTrue(len(dgraph.rejected_dependencies) >= 1)
+    def test_too_many_cycles(self):
+        self.assertRaises(ValueError, Generators.planted_cycles, 3, seed=1, num_cycles=20)
+
+class BenchmarkSuite(unittest.TestCase):
+    def test_run_benchmark(self):
+        result = Suite.run_benchmark('nested_diamonds', 100, max_export_chars=10000)
+        self.assertEqual(sorted(result['seconds'].keys()), sorted(Suite.OPERATIONS))
+        self.assertFalse(result['has_cycles'])
+        self.assertEqual(result['num_edges'], 100)
+        self.assertTrue(result['metrics']['counters'][DependencyGraph.EDGES_SCANNED] > 0)
+        self.assertEqual(result['metrics']['phases']['set_startStopInfoByName']['calls'], 2)
+        # The XML output of a chain of 50 diamonds is too long, but not the JSON.
+        self.assertEqual(result['seconds']['xml_export'], None)
+        self.assertTrue(result['json_chars'] > 0)
+    def test_main(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                Suite.main(['--generators', 'chain', 'planted_cycles', '--edges', '50', '100',
+                            '--output', path])
+            with open(path) as fp:
+                saved = json.load(fp)
+        finally:
+            os.remove(path)
+        self.assertEqual([(result['generator'], result['requested_edges'])
+                          for result in saved['results']],
+                         [('chain', 50), ('chain', 100),
+                          ('planted_cycles', 50), ('planted_cycles', 100)])
+        self.assertTrue(saved['results'][-1]['has_cycles'])
+
+class RegressionHarness(unittest.TestCase):
+    def test_compare(self):
+        baseline = [1.0, 1.02, 0.98, 1.01, 0.99, 1.0]
+        result = Regression.compare(baseline, [2 * t for t in baseline])
+        self.assertEqual(result['status'], Regression.REGRESSION)
+        self.assertEqual(result['ratio'], 2.0)
+        self.assertTrue(1 < result['interval'][0] <= 2.0 <= result['interval'][1])
+        result = Regression.compare(baseline, [t / 2 for t in baseline])
+        self.assertEqual(result['status'], Regression.IMPROVEMENT)
+        result = Regression.compare(baseline, [1.05 * t for t in baseline])
+        self.assertEqual(result['status'], Regression.UNCHANGED)
+        # A slower median, but too noisy to be sure of it.
+        result = Regression.compare(baseline, [0.5, 3.0, 0.6, 2.5, 0.7, 2.0])
+        self.assertEqual(result['status'], Regression.INCONCLUSIVE)
+    def test_planted_regression(self):
+        source = Regression.get_module_source(Regression.REPOSITORY_DIR)
+        slow_source = source.replace(
+            '    def init_nodes(self, components):\n',
+            '    def init_nodes(self, components):\n        time.sleep(0.02)\n', 1)
+        self.assertNotEqual(source, slow_source)
+        baseline = Regression.Version('baseline', source)
+        candidate = Regression.Version('candidate', slow_source)
+        try:
+            report = Regression.run_comparison(baseline, candidate, ['random_dag'], [500],
+                                               num_runs=3, num_warmup_runs=0, repeat=1)
+        finally:
+            baseline.remove()
+            candidate.remove()
+        self.assertEqual(len(report['samples']['candidate']['random_dag/500']['startup']), 3)
+        comparisons = report['comparisons']['random_dag/500']
+        self.assertEqual(comparisons['construct_strict']['status'], Regression.REGRESSION)
+        self.assertEqual(comparisons['construct_non_strict']['status'], Regression.REGRESSION)
+    def test_unknown_version(self):
+        self.assertRaises(ValueError, Regression.get_module_source, 'no-such-revision')
+
+if __name__=='__main__':
+    unittest.main()
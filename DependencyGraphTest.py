@@ -23,6 +23,11 @@
 
 from datetime import timedelta
 import DependencyGraph
+import io
+import json
+import logging
+import re
+import tracemalloc
 import unittest
 
 class EmptyGraph(unittest.TestCase):
@@ -176,6 +181,562 @@ class FourNodeDiamond(unittest.TestCase):
     def test_num_nodes(self):
         self.assertTrue(self.dgraph.num_nodes() == 4)
 
+class FourNodeDiamondBase(unittest.TestCase):
+    """The setUp of FourNodeDiamond without its tests, for the suites
+    that use the same graph, so that they do not run those tests again."""
+    setUp = FourNodeDiamond.setUp
+
+class FourNodeDiamondIncrementalSchedule(FourNodeDiamondBase):
+    def setUp(self):
+        FourNodeDiamondBase.setUp(self)
+        self.dgraph.set_startStopInfoByName(DependencyGraph.DependencyDirection.STARTUP)
+        self.dgraph.set_startStopInfoByName(DependencyGraph.DependencyDirection.SHUTDOWN)
+    def assert_matches_full_schedule(self):
+        deps = [{DependencyGraph.COMPONENT_KEY: name,
+                 DependencyGraph.REQUIREMENT_KEY: req_name}
+                for name, node in self.dgraph.nodesByName.items()
+                for req_name in node.children]
+        full_dgraph = DependencyGraph.DependencyGraph(self.comps, deps, verbosity=0)
+        full_dgraph.set_startStopInfoByName(DependencyGraph.DependencyDirection.STARTUP)
+        full_dgraph.set_startStopInfoByName(DependencyGraph.DependencyDirection.SHUTDOWN)
+        self.assertEqual(self.dgraph.startStopInfoByName,
+                         full_dgraph.startStopInfoByName)
+    def test_set_component_times(self):
+        self.dgraph.set_component_times('b', start_time=timedelta(minutes=10))
+        self.assertEqual(
+            self.dgraph.startStopInfoByName['d'][DependencyGraph.BEGIN_STARTUP_KEY],
+            timedelta(minutes=11))
+        self.assert_matches_full_schedule()
+    def test_early_stop(self):
+        # b still ends before c, so the startup update stops at d,
+        # and the shutdown update stops at b.
+        num_recomputed = self.dgraph.set_component_times(
+            'b', start_time=timedelta(minutes=3))
+        self.assertTrue(num_recomputed == 3)
+        self.assert_matches_full_schedule()
+    def test_dependency_changes(self):
+        self.dgraph.remove_dependency('a', 'c')
+        self.assert_matches_full_schedule()
+        self.dgraph.add_dependency('b', 'c')
+        self.assert_matches_full_schedule()
+
+class FourNodeDiamondCompact(FourNodeDiamondBase):
+    def setUp(self):
+        FourNodeDiamondBase.setUp(self)
+        self.full_dgraph = self.dgraph
+        self.dgraph = DependencyGraph.DependencyGraph(
+            self.comps,
+            self.deps,
+            verbosity=0,
+            is_compact=True)
+    def test_roots_and_leaves(self):
+        self.assertEqual(list(self.dgraph.rootsByName.keys()), ['a'])
+        self.assertEqual(list(self.dgraph.leavesByName.keys()), ['d'])
+        self.assertEqual(sorted(self.dgraph.nodesByName['d'].parents.keys()),
+                         ['b', 'c'])
+    def test_startStopInfoByName(self):
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            self.dgraph.set_startStopInfoByName(direction)
+            self.full_dgraph.set_startStopInfoByName(direction)
+        self.assertEqual(self.dgraph.startStopInfoByName,
+                         self.full_dgraph.startStopInfoByName)
+        self.assertEqual(
+            self.dgraph.startStopInfoByName['d'][DependencyGraph.END_STARTUP_KEY],
+            timedelta(minutes=9))
+    def test_xml_str(self):
+        strip_ids = lambda xml: re.sub(" id='[0-9]+'", '', xml)
+        self.assertEqual(strip_ids(self.dgraph.xml_str(2)),
+                         strip_ids(self.full_dgraph.xml_str(2)))
+    def test_read_only(self):
+        self.assertRaises(DependencyGraph.DependencyReadOnlyException,
+                          self.dgraph.add_component, 'e', self.comps['a'])
+        self.assertRaises(DependencyGraph.DependencyReadOnlyException,
+                          self.dgraph.add_dependency, 'b', 'c')
+        self.assertRaises(DependencyGraph.DependencyReadOnlyException,
+                          self.dgraph.remove_dependency, 'a', 'b')
+
+class FourNodeDiamondCriticalPath(FourNodeDiamondBase):
+    def test_startup_slack(self):
+        self.dgraph.set_slackInfoByName(DependencyGraph.DependencyDirection.STARTUP)
+        info = self.dgraph.startStopInfoByName['b']
+        self.assertEqual(info[DependencyGraph.LATEST_BEGIN_STARTUP_KEY], timedelta(minutes=3))
+        self.assertEqual(info[DependencyGraph.LATEST_END_STARTUP_KEY], timedelta(minutes=5))
+        self.assertEqual(info[DependencyGraph.STARTUP_SLACK_KEY], timedelta(minutes=2))
+        self.assertEqual(info[DependencyGraph.STARTUP_FREE_SLACK_KEY], timedelta(minutes=2))
+        for name in ['a', 'c', 'd']:
+            self.assertEqual(self.dgraph.startStopInfoByName[name][
+                DependencyGraph.STARTUP_SLACK_KEY], timedelta(minutes=0))
+        self.assertEqual(list(self.dgraph.critical_paths()), [['a', 'c', 'd']])
+    def test_shutdown_slack(self):
+        shutdown = DependencyGraph.DependencyDirection.SHUTDOWN
+        # Shutdown times are based on those of the children, so d comes first.
+        self.assertEqual(list(self.dgraph.critical_paths(shutdown)), [['d', 'c', 'a']])
+        info = self.dgraph.startStopInfoByName['b']
+        self.assertEqual(info[DependencyGraph.EARLIEST_BEGIN_SHUTDOWN_KEY], timedelta(minutes=-12))
+        self.assertEqual(info[DependencyGraph.EARLIEST_END_SHUTDOWN_KEY], timedelta(minutes=-10))
+        self.assertEqual(info[DependencyGraph.SHUTDOWN_SLACK_KEY], timedelta(minutes=2))
+    def test_tied_paths(self):
+        self.dgraph.set_component_times('b', start_time=timedelta(minutes=4))
+        self.assertEqual(sorted(self.dgraph.critical_paths()),
+                         [['a', 'b', 'd'], ['a', 'c', 'd']])
+    def test_compact(self):
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, is_compact=True)
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            dgraph.set_slackInfoByName(direction)
+            self.dgraph.set_slackInfoByName(direction)
+        self.assertEqual(dgraph.startStopInfoByName, self.dgraph.startStopInfoByName)
+
+class FourNodeDiamondRestart(FourNodeDiamondBase):
+    def test_plan_restart(self):
+        plan = self.dgraph.plan_restart(['b'])
+        self.assertEqual(sorted(plan.keys()), ['a', 'b'])
+        self.assertEqual(plan['a'][DependencyGraph.BEGIN_SHUTDOWN_KEY], timedelta(minutes=-3))
+        self.assertEqual(plan['b'][DependencyGraph.END_SHUTDOWN_KEY], timedelta(minutes=0))
+        self.assertEqual(plan['b'][DependencyGraph.BEGIN_STARTUP_KEY], timedelta(minutes=1))
+        self.assertEqual(plan['b'][DependencyGraph.END_STARTUP_KEY], timedelta(minutes=3))
+    def test_restart_all(self):
+        self.assertEqual(self.dgraph.get_dependent_names(['d']), ['a', 'b', 'c', 'd'])
+        plan = self.dgraph.plan_restart(['d'])
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            self.dgraph.set_startStopInfoByName(direction)
+        self.assertEqual(plan, self.dgraph.startStopInfoByName)
+    def test_compact(self):
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, is_compact=True)
+        self.assertEqual(dgraph.plan_restart(['b', 'c']), self.dgraph.plan_restart(['b', 'c']))
+        self.assertRaises(KeyError, dgraph.plan_restart, ['e'])
+
+class FourNodeDiamondReachability(FourNodeDiamondBase):
+    def test_requires(self):
+        self.assertTrue(self.dgraph.requires('a', 'd'))
+        self.assertTrue(self.dgraph.requires('b', 'd'))
+        self.assertFalse(self.dgraph.requires('d', 'a'))
+        self.assertFalse(self.dgraph.requires('b', 'c'))
+        self.assertFalse(self.dgraph.requires('a', 'a'))
+    def test_changes(self):
+        self.assertFalse(self.dgraph.requires('b', 'c'))
+        self.dgraph.add_dependency('b', 'c')
+        self.assertTrue(self.dgraph.requires('b', 'c'))
+        self.dgraph.remove_dependency('c', 'd')
+        self.assertFalse(self.dgraph.requires('c', 'd'))
+    def test_grail(self):
+        index = self.dgraph.get_index()
+        tsorted_ids = [index.idByName[name] for name in self.dgraph.start_tsorted_names]
+        bitsets = DependencyGraph.BitsetReachability(index, tsorted_ids)
+        grail = DependencyGraph.GrailReachability(index, tsorted_ids, num_labels=2)
+        for source_id in range(index.num_nodes()):
+            for target_id in range(index.num_nodes()):
+                self.assertEqual(grail.reaches(source_id, target_id),
+                                 bitsets.reaches(source_id, target_id))
+
+class FourNodeDiamondTransitiveReduction(FourNodeDiamondBase):
+    def setUp(self):
+        FourNodeDiamondBase.setUp(self)
+        self.deps.append({DependencyGraph.COMPONENT_KEY: 'a',
+                          DependencyGraph.REQUIREMENT_KEY: 'd'})
+    def test_transitive_reduction(self):
+        for is_compact in [False, True]:
+            dgraph = DependencyGraph.DependencyGraph(
+                self.comps, self.deps, verbosity=0, is_compact=is_compact)
+            self.assertEqual(dgraph.get_redundant_dependencies(), [('a', 'd')])
+            reduced = dgraph.transitive_reduction()
+            self.assertTrue(reduced.num_edges() == 4)
+            self.assertTrue(reduced.is_compact == is_compact)
+            self.assertTrue(reduced.requires('a', 'd'))
+            for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                              DependencyGraph.DependencyDirection.SHUTDOWN]:
+                dgraph.set_startStopInfoByName(direction)
+                reduced.set_startStopInfoByName(direction)
+            self.assertEqual(reduced.startStopInfoByName, dgraph.startStopInfoByName)
+
+class FourNodeDiamondPartialSchedule(FourNodeDiamondBase):
+    def test_startup(self):
+        names = self.dgraph.set_startStopInfoByName_partial(['b'])
+        self.assertEqual(names, ['a', 'b'])
+        self.assertEqual(sorted(self.dgraph.startStopInfoByName.keys()), ['a', 'b'])
+        self.assertEqual(
+            self.dgraph.startStopInfoByName['b'][DependencyGraph.END_STARTUP_KEY],
+            timedelta(minutes=3))
+        self.assertFalse(self.dgraph.scheduledDirections)
+    def test_matches_full_schedule(self):
+        for is_compact in [False, True]:
+            dgraph = DependencyGraph.DependencyGraph(
+                self.comps, self.deps, verbosity=0, is_compact=is_compact)
+            for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                              DependencyGraph.DependencyDirection.SHUTDOWN]:
+                names = dgraph.set_startStopInfoByName_partial(['d', 'c'], direction)
+                if direction == DependencyGraph.DependencyDirection.STARTUP:
+                    self.assertEqual(len(names), 4)
+                else:
+                    self.assertEqual(names, ['d', 'c'])
+                self.dgraph.set_startStopInfoByName(direction)
+            for name in ['c', 'd']:
+                self.assertEqual(dgraph.startStopInfoByName[name],
+                                 self.dgraph.startStopInfoByName[name])
+
+class FourNodeDiamondReadyTime(FourNodeDiamondBase):
+    def test_ready_time(self):
+        self.assertEqual(self.dgraph.ready_time('d'), timedelta(minutes=9))
+        self.assertEqual(sorted(self.dgraph.readyTimesByDirection[
+            DependencyGraph.DependencyDirection.STARTUP].keys()), ['a', 'b', 'c', 'd'])
+        self.assertEqual(self.dgraph.ready_time(
+            'a', DependencyGraph.DependencyDirection.SHUTDOWN), timedelta(minutes=-13))
+        self.assertFalse(self.dgraph.startStopInfoByName)
+    def test_invalidation(self):
+        self.assertEqual(self.dgraph.ready_time('d'), timedelta(minutes=9))
+        self.dgraph.set_component_times('b', start_time=timedelta(minutes=10))
+        readyTimeByName = self.dgraph.readyTimesByDirection[
+            DependencyGraph.DependencyDirection.STARTUP]
+        self.assertEqual(sorted(readyTimeByName.keys()), ['a', 'c'])
+        self.assertEqual(self.dgraph.ready_time('d'), timedelta(minutes=15))
+        self.dgraph.remove_dependency('a', 'b')
+        self.assertEqual(self.dgraph.ready_time('d'), timedelta(minutes=14))
+    def test_compact(self):
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, is_compact=True)
+        self.assertEqual(dgraph.ready_time('d'), timedelta(minutes=9))
+
+class FourNodeDiamondTracing(FourNodeDiamondBase):
+    def test_untraced(self):
+        # With verbosity 0, traced methods are looked up undecorated.
+        self.assertTrue(self.dgraph.set_startStopInfoByName.__func__
+                        is DependencyGraph.DependencyGraph.set_startStopInfoByName)
+    def test_logging(self):
+        with self.assertLogs('DependencyGraph', level=logging.DEBUG) as logs:
+            dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, verbosity=2)
+            dgraph.set_startStopInfoByName()
+        messages = [record.getMessage().strip() for record in logs.records]
+        self.assertTrue('Adding the edge a -> b' in messages)
+        self.assertTrue('Entering set_startStopInfoByName' in messages)
+        self.assertFalse('Entering init_check_for_cycles_roots' in messages)
+    def test_log_level(self):
+        with self.assertLogs('DependencyGraph', level=logging.DEBUG) as logs:
+            DependencyGraph.DependencyGraph(self.comps, self.deps, verbosity=3)
+        self.assertEqual(set([record.levelno for record in logs.records]),
+                         set([logging.INFO, logging.DEBUG]))
+        with self.assertLogs('DependencyGraph', level=logging.INFO) as logs:
+            DependencyGraph.DependencyGraph(self.comps, self.deps, verbosity=2)
+        self.assertEqual(set([record.levelno for record in logs.records]),
+                         set([logging.INFO]))
+    def test_logging_unchanged(self):
+        # Only the application configures where the messages go.
+        handlers = list(DependencyGraph.logger.handlers)
+        level = DependencyGraph.logger.level
+        DependencyGraph.DependencyGraph(self.comps, self.deps, verbosity=2)
+        self.assertEqual(DependencyGraph.logger.handlers, handlers)
+        self.assertEqual(DependencyGraph.logger.level, level)
+    def test_verbosity_change(self):
+        self.dgraph.verbosity = 2
+        with self.assertLogs('DependencyGraph', level=logging.DEBUG) as logs:
+            self.dgraph.set_startStopInfoByName()
+        messages = [record.getMessage().strip() for record in logs.records]
+        self.assertTrue('Entering set_startStopInfoByName' in messages)
+        self.dgraph.verbosity = 0
+        self.assertTrue(self.dgraph.set_startStopInfoByName.__func__
+                        is DependencyGraph.DependencyGraph.set_startStopInfoByName)
+
+class FourNodeDiamondMetrics(FourNodeDiamondBase):
+    def test_metrics(self):
+        metrics = DependencyGraph.DependencyMetrics()
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, metrics=metrics)
+        dgraph.set_startStopInfoByName()
+        result = metrics.as_dict()
+        self.assertEqual(sorted(result['phases'].keys()),
+                         ['init_check_for_cycles', 'init_check_for_cycles_roots',
+                          'init_edges', 'init_nodes', 'set_startStopInfoByName'])
+        self.assertEqual(result['phases']['init_edges']['calls'], 1)
+        self.assertTrue(result['phases']['init_edges']['wall_time'] >= 0)
+        self.assertEqual(result['counters'], {
+            DependencyGraph.EDGES_SCANNED: 12,
+            DependencyGraph.NODES_ENQUEUED: 4,
+            DependencyGraph.BACK_EDGES_REJECTED: 0,
+            DependencyGraph.REMEDIATION_PASSES: 0})
+    def test_cycle_counters(self):
+        metrics = DependencyGraph.DependencyMetrics()
+        deps = self.deps + [{DependencyGraph.COMPONENT_KEY: 'd',
+                             DependencyGraph.REQUIREMENT_KEY: 'a'}]
+        for is_compact in [False, True]:
+            DependencyGraph.DependencyGraph(self.comps, deps, is_strict=False,
+                                            is_compact=is_compact, metrics=metrics)
+        self.assertEqual(metrics.counters[DependencyGraph.BACK_EDGES_REJECTED], 2)
+        self.assertEqual(metrics.counters[DependencyGraph.REMEDIATION_PASSES], 2)
+        self.assertEqual(metrics.counters[DependencyGraph.NODES_ENQUEUED], 8)
+    def test_derived_graphs(self):
+        metrics = DependencyGraph.DependencyMetrics()
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, metrics=metrics)
+        counters = dict(metrics.counters)
+        reduced = dgraph.transitive_reduction()
+        subgraph = dgraph.restart_subgraph(['b'])
+        self.assertTrue(reduced.metrics is None)
+        self.assertTrue(subgraph.metrics is None)
+        self.assertEqual(metrics.phasesByName['transitive_reduction']['calls'], 1)
+        self.assertEqual(metrics.phasesByName['restart_subgraph']['calls'], 1)
+        self.assertEqual(metrics.phasesByName['init_edges']['calls'], 1)
+        self.assertFalse('set_startStopInfoByName' in metrics.phasesByName)
+        self.assertEqual(metrics.counters, counters)
+    def test_json_lines(self):
+        fp = io.StringIO()
+        metrics = DependencyGraph.DependencyMetrics(trace_allocations=True, fp=fp)
+        try:
+            DependencyGraph.DependencyGraph(self.comps, self.deps, metrics=metrics)
+        finally:
+            tracemalloc.stop()
+        lines = [json.loads(line) for line in fp.getvalue().splitlines()]
+        self.assertEqual([line['phase'] for line in lines],
+                         ['init_nodes', 'init_edges',
+                          'init_check_for_cycles_roots', 'init_check_for_cycles'])
+        self.assertTrue(metrics.phasesByName['init_nodes']['peak_allocated'] > 0)
+        fp = io.StringIO()
+        metrics.write_json_lines(fp)
+        lines = [json.loads(line) for line in fp.getvalue().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[-1]['counters'], metrics.counters)
+
+class FourNodeDiamondXml(FourNodeDiamondBase):
+    def test_xml_str(self):
+        strip_ids = lambda xml: re.sub(" id='[0-9]+'", '', xml)
+        get_attrDictByName = lambda name: self.comps[name]
+        xml = strip_ids(self.dgraph.xml_str(get_attrDictByName=get_attrDictByName,
+                                            attr_keys=[DependencyGraph.START_KEY]))
+        self.assertEqual(xml.splitlines(), [
+            "<DependencyGraph>",
+            "  <DependencyNode name='a' tstart='0:01:00' >",
+            "    <DependencyNode name='b' tstart='0:02:00' >",
+            "      <DependencyNode name='d' tstart='0:04:00' />",
+            "    </DependencyNode>",
+            "    <DependencyNode name='c' tstart='0:04:00' >",
+            "      <DependencyNode name='d' tstart='0:04:00' />",
+            "    </DependencyNode>",
+            "  </DependencyNode>",
+            "</DependencyGraph>"])
+    def test_write_xml(self):
+        fp = io.StringIO()
+        self.dgraph.write_xml(fp, 2, roots=self.dgraph.leavesByName.values(),
+                              get_childrenByName=lambda node: node.parents.values())
+        self.assertEqual(fp.getvalue(), self.dgraph.xml_str(
+            2, roots=self.dgraph.leavesByName.values(),
+            get_childrenByName=lambda node: node.parents.values()))
+        self.assertTrue(fp.getvalue().startswith("  <DependencyGraph>\n    <DependencyNode name='d'"))
+    def test_xml_str_dag(self):
+        d_id = self.dgraph.nodesByName['d'].xml_id()
+        lines = self.dgraph.xml_str(dag=True).splitlines()
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(lines[3].strip(), "<DependencyNode name='d' id='" + d_id + "'/>")
+        self.assertEqual(lines[6].strip(), "<DependencyNodeRef name='d' ref='" + d_id + "'/>")
+    def test_json_str(self):
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, is_compact=True)
+        nodes = json.loads(dgraph.json_str(
+            get_attrDictByName=lambda name: self.comps[name],
+            attr_keys=[DependencyGraph.START_KEY]))['DependencyGraph']
+        self.assertEqual([node['name'] for node in nodes], ['a', 'b', 'd', 'c'])
+        idByName = dict([(node['name'], node['id']) for node in nodes])
+        self.assertEqual(nodes[0]['children'], [idByName['b'], idByName['c']])
+        self.assertEqual(nodes[3]['children'], [idByName['d']])
+        self.assertEqual(nodes[2][DependencyGraph.START_KEY], '0:04:00')
+
+class StackedDiamondsXml(unittest.TestCase):
+    def setUp(self):
+        # 30 diamonds, each one's bottom node the next one's top node:
+        # there are 2**30 paths from the top node to the bottom one.
+        self.num_diamonds = 30
+        comps = {}
+        deps = []
+        for i in range(self.num_diamonds):
+            for name in ['top' + str(i), 'left' + str(i), 'right' + str(i)]:
+                comps[name] = {DependencyGraph.START_KEY: timedelta(minutes=1),
+                               DependencyGraph.STOP_KEY: timedelta(minutes=1)}
+            bottom = 'top' + str(i + 1)
+            for comp, req in [('top', 'left'), ('top', 'right'), ('left', None), ('right', None)]:
+                deps.append({DependencyGraph.COMPONENT_KEY: comp + str(i),
+                             DependencyGraph.REQUIREMENT_KEY: req + str(i) if req else bottom})
+        comps['top' + str(self.num_diamonds)] = comps['top0']
+        self.dgraph = DependencyGraph.DependencyGraph(comps, deps, verbosity=0)
+    def test_xml_str_dag(self):
+        xml = self.dgraph.xml_str(dag=True)
+        self.assertEqual(xml.count('<DependencyNode '), self.dgraph.num_nodes())
+        self.assertEqual(xml.count('<DependencyNodeRef '),
+                         self.dgraph.num_edges() - self.dgraph.num_nodes() + 1)
+    def test_write_json(self):
+        fp = io.StringIO()
+        self.dgraph.write_json(fp)
+        nodes = json.loads(fp.getvalue())['DependencyGraph']
+        self.assertEqual(len(nodes), self.dgraph.num_nodes())
+        self.assertEqual(sum([len(node['children']) for node in nodes]),
+                         self.dgraph.num_edges())
+
+class ThreeNodeCycleCompact(unittest.TestCase):
+    def setUp(self):
+        self.tnc = ThreeNodeCycle()
+    def test_cycle_exception(self):
+        self.assertRaises(DependencyGraph.DependencyCycleException,
+                          DependencyGraph.DependencyGraph,
+                          self.tnc.comps,
+                          self.tnc.deps,
+                          is_strict=True,
+                          verbosity=0,
+                          is_compact=True)
+    def test_num_edges_non_strict(self):
+        dgraph = DependencyGraph.DependencyGraph(
+            self.tnc.comps,
+            self.tnc.deps,
+            is_strict=False,
+            verbosity=0,
+            is_compact=True)
+        self.assertTrue(dgraph.num_edges() == 2)
+        self.assertTrue(len(dgraph.rejected_dependencies) == 1)
+
+class CycleBelowRootNonStrict(unittest.TestCase):
+    def setUp(self):
+        comps = ThreeNodeCycle().comps
+        deps = [
+            {DependencyGraph.COMPONENT_KEY: 'a',
+                 DependencyGraph.REQUIREMENT_KEY: 'b'},
+            {DependencyGraph.COMPONENT_KEY: 'b',
+                 DependencyGraph.REQUIREMENT_KEY: 'c'},
+            {DependencyGraph.COMPONENT_KEY: 'c',
+                 DependencyGraph.REQUIREMENT_KEY: 'b'},
+        ]
+        self.dgraph = DependencyGraph.DependencyGraph(
+            comps,
+            deps,
+            is_strict=False,
+            verbosity=0)
+    def test_rejected_dependencies(self):
+        # Only an edge inside the cycle b <--> c is dropped.
+        self.assertEqual(len(self.dgraph.rejected_dependencies), 1)
+        self.assertTrue('b' in self.dgraph.nodesByName['a'].children)
+        self.assertEqual(list(self.dgraph.rootsByName.keys()), ['a'])
+        self.assertEqual(self.dgraph.start_tsorted_names[0], 'a')
+
+class ThreeNodeCycleWithChordNonStrict(unittest.TestCase):
+    def setUp(self):
+        self.tnc = ThreeNodeCycle()
+        self.tnc.deps.append({DependencyGraph.COMPONENT_KEY: 'c',
+                              DependencyGraph.REQUIREMENT_KEY: 'b'})
+    def test_back_edge_remediation(self):
+        dgraph = DependencyGraph.DependencyGraph(
+            self.tnc.comps,
+            self.tnc.deps,
+            is_strict=False,
+            verbosity=0)
+        self.assertTrue(dgraph.num_edges() == 2)
+        self.assertTrue(dgraph.remediation_stats['num_saved'] == 0)
+    def test_eades_lin_smyth_remediation(self):
+        for is_compact in [False, True]:
+            dgraph = DependencyGraph.DependencyGraph(
+                self.tnc.comps,
+                self.tnc.deps,
+                is_strict=False,
+                verbosity=0,
+                is_compact=is_compact,
+                remediation=DependencyGraph.EadesLinSmythRemediation())
+            self.assertEqual(dgraph.rejected_dependencies, [('b', 'c')])
+            self.assertTrue(dgraph.num_edges() == 3)
+            self.assertTrue(dgraph.remediation_stats['num_saved'] == 1)
+
+class TenNodeCyclesNonStrict(unittest.TestCase):
+    def setUp(self):
+        self.comps = dict([('n%d' % i, {DependencyGraph.START_KEY: timedelta(minutes=1),
+                                        DependencyGraph.STOP_KEY: timedelta(minutes=1)})
+                           for i in range(10)])
+        edges = [(0, 7), (0, 8), (1, 3), (1, 4), (2, 9), (3, 2), (3, 4), (4, 1), (4, 3),
+                 (4, 5), (4, 6), (6, 9), (7, 2), (7, 3), (8, 0), (8, 9), (9, 0), (9, 4),
+                 (9, 6)]
+        self.deps = [{DependencyGraph.COMPONENT_KEY: 'n%d' % comp_id,
+                      DependencyGraph.REQUIREMENT_KEY: 'n%d' % req_id}
+                     for comp_id, req_id in edges]
+    def test_eades_lin_smyth_schedule(self):
+        # Rejected edges must not be counted again when the sort resumes.
+        for is_compact in [False, True]:
+            dgraph = DependencyGraph.DependencyGraph(
+                self.comps,
+                self.deps,
+                is_strict=False,
+                verbosity=0,
+                is_compact=is_compact,
+                remediation=DependencyGraph.EadesLinSmythRemediation(0))
+            self.assertEqual(len(dgraph.start_tsorted_names), 10)
+            dgraph.set_startStopInfoByName()
+            info = dgraph.startStopInfoByName
+            for name, node in dgraph.nodesByName.items():
+                for req_name in node.children:
+                    self.assertTrue(info[name][DependencyGraph.END_STARTUP_KEY]
+                                    <= info[req_name][DependencyGraph.BEGIN_STARTUP_KEY])
+
+class LongCycleNonStrict(unittest.TestCase):
+    def setUp(self):
+        self.num_nodes = 5000
+        comps = dict([(str(i), {DependencyGraph.START_KEY: timedelta(minutes=1),
+                                DependencyGraph.STOP_KEY: timedelta(minutes=1)})
+                      for i in range(self.num_nodes)])
+        deps = [{DependencyGraph.COMPONENT_KEY: str(i),
+                 DependencyGraph.REQUIREMENT_KEY: str((i + 1) % self.num_nodes)}
+                for i in range(self.num_nodes)]
+        self.dgraph = DependencyGraph.DependencyGraph(
+            comps,
+            deps,
+            is_strict=False,
+            verbosity=0)
+    def test_num_edges(self):
+        self.assertTrue(self.dgraph.num_edges() == self.num_nodes - 1)
+        self.assertTrue(len(self.dgraph.rejected_dependencies) == 1)
+    def test_tsorted_names(self):
+        self.assertTrue(len(self.dgraph.start_tsorted_names) == self.num_nodes)
+    def test_ready_time(self):
+        last = self.dgraph.start_tsorted_names[-1]
+        self.assertEqual(self.dgraph.ready_time(last), timedelta(minutes=self.num_nodes))
+    def test_requires(self):
+        first, last = self.dgraph.start_tsorted_names[0], self.dgraph.start_tsorted_names[-1]
+        self.assertTrue(self.dgraph.requires(first, last))
+        self.assertFalse(self.dgraph.requires(last, first))
+    def test_write_xml(self):
+        fp = io.StringIO()
+        self.dgraph.write_xml(fp)
+        self.assertEqual(fp.getvalue().count('<DependencyNode '), self.num_nodes)
+
+class ThreeNodeChainIncremental(unittest.TestCase):
+    def setUp(self):
+        tnc = ThreeNodeCycle()
+        self.dgraph = DependencyGraph.DependencyGraph(tnc.comps, [], verbosity=0)
+        self.dgraph.add_dependency('c', 'b')
+        self.dgraph.add_dependency('b', 'a')
+    def assert_tsorted(self):
+        positions = self.dgraph.tsorted_positions()
+        for name, node in self.dgraph.nodesByName.items():
+            for child_name in node.children:
+                self.assertTrue(positions[name] < positions[child_name])
+    def test_add_dependency(self):
+        self.assert_tsorted()
+        self.assertEqual(self.dgraph.start_tsorted_names, ['c', 'b', 'a'])
+        self.assertEqual(list(self.dgraph.rootsByName.keys()), ['c'])
+        self.assertEqual(list(self.dgraph.leavesByName.keys()), ['a'])
+    def test_add_cycle_strict(self):
+        self.assertRaises(DependencyGraph.DependencyCycleException,
+                          self.dgraph.add_dependency, 'a', 'c')
+        self.assertTrue(self.dgraph.num_edges() == 2)
+        self.assert_tsorted()
+    def test_add_cycle_non_strict(self):
+        self.dgraph.is_strict = False
+        self.assertFalse(self.dgraph.add_dependency('a', 'c'))
+        self.assertEqual(self.dgraph.rejected_dependencies, [('a', 'c')])
+    def test_add_duplicate(self):
+        self.assertRaises(DependencyGraph.DependencyDuplicateDependencyException,
+                          self.dgraph.add_dependency, 'c', 'b')
+    def test_remove_dependency(self):
+        self.dgraph.remove_dependency('c', 'b')
+        self.assertEqual(sorted(self.dgraph.rootsByName.keys()), ['b', 'c'])
+        self.assertEqual(sorted(self.dgraph.leavesByName.keys()), ['a', 'c'])
+        self.dgraph.add_dependency('a', 'c')
+        self.assert_tsorted()
+        self.assertRaises(ValueError, self.dgraph.remove_dependency, 'c', 'b')
+    def test_add_component(self):
+        self.dgraph.add_component('d', {DependencyGraph.START_KEY: timedelta(minutes=1),
+                                        DependencyGraph.STOP_KEY: timedelta(minutes=1)})
+        self.dgraph.add_dependency('d', 'c')
+        self.assert_tsorted()
+        self.assertEqual(list(self.dgraph.rootsByName.keys()), ['d'])
+
 class SixNodeGraphWithCyclesNonStrict(unittest.TestCase):
     def setUp(self):
         comps = {
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Start/stop schedules with limited parallelism.
+DependencyGraph.set_startStopInfoByName() lets any number of components start
+at once.  ListScheduler instead limits the number of components in progress
+at once ("slots"), and/or the total demand of the components in progress for
+each resource (e.g., CPU or memory), given with the DEMAND_KEY attribute.
+It uses list scheduling: whenever a component finishes, the ready components
+are started in order of priority, while they fit, where the priority of a
+component is the length of the longest chain of components that waits for it,
+including itself."""
+
+import heapq
+
+from datetime import timedelta
+
+from DependencyGraph import (BEGIN_SHUTDOWN_KEY, BEGIN_STARTUP_KEY, DEMAND_KEY,
+                             END_SHUTDOWN_KEY, END_STARTUP_KEY, START_KEY,
+                             STOP_KEY, DependencyDirection)
+
+MICROSECOND = timedelta(microseconds=1)
+
+class ListScheduleResult(object):
+    """The results of ListScheduler.schedule().
+    @ivar startStopInfoByName: The begin and end times of the components,
+        keyed like DependencyGraph.startStopInfoByName.
+    @ivar makespan: The total time taken, as a timedelta.
+    @ivar utilization: A dictionary of the average fraction of the capacity
+        in use, indexed by resource name, and by 'slots' if the number of
+        slots was limited."""
+    def __init__(self, startStopInfoByName, makespan, utilization):
+        self.startStopInfoByName = startStopInfoByName
+        self.makespan = makespan
+        self.utilization = utilization
+
+class ListScheduler(object):
+    """Computes start/stop schedules that respect both the dependencies and
+    a limited capacity.  The ready components are kept in a heap, so each
+    start and finish takes logarithmic time.  When only the number of slots
+    is limited, any ready component fits in a free slot.  Otherwise, ready
+    components that do not fit are passed over, and a lower-priority
+    component that fits may start first.  To keep this cheap, at most
+    "lookahead" components are passed over each time components are started."""
+    def __init__(self, dgraph, num_slots=None, capacity=None, lookahead=16):
+        """@param: dgraph: An (acyclic) DependencyGraph, which should not be
+            changed afterward.
+        @param: num_slots: The maximum number of components in progress at once,
+            or None for no limit.
+        @param: capacity: A dictionary of the amount of each resource, indexed by
+            resource name.  The demand of each component is a similar dictionary,
+            given by its DEMAND_KEY attribute.  Resources that are not in the
+            capacity are not limited.
+        @param: lookahead: The number of ready components that do not fit,
+            and that can be passed over to start lower-priority ones.
+        @throws ValueError if there is no limit, or a component could never fit."""
+        if num_slots is None and not capacity:
+            raise ValueError('Either num_slots or capacity must be given')
+        if num_slots is not None and num_slots < 1:
+            raise ValueError('The number of slots must be positive')
+        self.dgraph = dgraph
+        self.num_slots = num_slots
+        self.capacity = dict(capacity or {})
+        self.lookahead = lookahead
+        self.resource_names = sorted(self.capacity.keys())
+        self.index = dgraph.get_index()
+        self.tsorted_ids = list(dgraph.get_tsorted_ids(self.index))
+        self.demands = None  # demands[node_id] is a tuple, in the order of resource_names
+        self.list_strategyByDirection = {}  # Built on demand by get_list_strategy()
+        if self.resource_names:
+            self.demands = self.get_demands()
+
+    def get_demands(self):
+        """Return the list of the demands of the components, indexed by node id.
+        @throws ValueError if the demand of a component exceeds the capacity."""
+        capacities = [self.capacity[resource_name] for resource_name in self.resource_names]
+        demands = []
+        for name in self.index.names:
+            demandByResource = self.dgraph.get_attributes(name).get(DEMAND_KEY, {})
+            demand = tuple([demandByResource.get(resource_name, 0)
+                            for resource_name in self.resource_names])
+            for resource_name, amount, capacity in zip(self.resource_names,
+                                                       demand, capacities):
+                if amount > capacity:
+                    raise ValueError('The demand of "%s" for %s (%s) exceeds the capacity (%s)'
+                                     % (name, resource_name, amount, capacity))
+            demands.append(demand)
+        return demands
+
+    def get_priorities(self, order, durations, succ_offsets, succ_ids):
+        """Return the list of the lengths of the longest chains of components
+        that start with each component, indexed by node id."""
+        priorities = list(durations)
+        for node_id in reversed(order):
+            longest = 0
+            for succ_id in succ_ids[succ_offsets[node_id]:succ_offsets[node_id + 1]]:
+                if priorities[succ_id] > longest:
+                    longest = priorities[succ_id]
+            priorities[node_id] += longest
+        return priorities
+
+    def get_list_strategy(self, dependency_direction):
+        """Return a dictionary of the arrays used to schedule the given direction.
+        It is computed once per direction, since it does not depend on the limits.
+        @throws ValueError"""
+        if dependency_direction in self.list_strategyByDirection:
+            return self.list_strategyByDirection[dependency_direction]
+        index = self.index
+        if dependency_direction == DependencyDirection.STARTUP:
+            order = self.tsorted_ids
+            succ_offsets, succ_ids = index.child_offsets, index.child_ids
+            pred_offsets = index.parent_offsets
+            duration_key = START_KEY
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            # Shutdown is scheduled backward from its end, like startup.
+            order = self.tsorted_ids[::-1]
+            succ_offsets, succ_ids = index.parent_offsets, index.parent_ids
+            pred_offsets = index.child_offsets
+            duration_key = STOP_KEY
+        else:
+            raise ValueError('Unknown DependencyDirection value, %s'
+                             % dependency_direction)
+        get_attributes = self.dgraph.get_attributes
+        durations = [get_attributes(name)[duration_key] // MICROSECOND
+                     for name in index.names]
+        positions = [0] * index.num_nodes()
+        for position, node_id in enumerate(order):
+            positions[node_id] = position
+        list_strategy = {
+            'order'        : order,
+            'succ_offsets' : succ_offsets,
+            'succ_ids'     : succ_ids,
+            'pred_offsets' : pred_offsets,
+            'durations'    : durations,
+            'priorities'   : self.get_priorities(order, durations, succ_offsets, succ_ids),
+            'positions'    : positions
+            }
+        self.list_strategyByDirection[dependency_direction] = list_strategy
+        return list_strategy
+
+    def schedule(self, dependency_direction=DependencyDirection.STARTUP):
+        """Return a ListScheduleResult for the given direction.
+        As in DependencyGraph.startStopInfoByName, startup begins at time zero,
+        and shutdown ends at time zero.
+        @throws ValueError"""
+        list_strategy = self.get_list_strategy(dependency_direction)
+        order = list_strategy['order']
+        succ_offsets, succ_ids = list_strategy['succ_offsets'], list_strategy['succ_ids']
+        pred_offsets = list_strategy['pred_offsets']
+        durations = list_strategy['durations']
+        priorities = list_strategy['priorities']
+        positions = list_strategy['positions']
+        num_nodes = self.index.num_nodes()
+        num_waiting = [pred_offsets[node_id + 1] - pred_offsets[node_id]
+                       for node_id in range(num_nodes)]
+        # Ready components are ordered by priority, then by topological position.
+        ready = [(-priorities[node_id], positions[node_id])
+                 for node_id in order if num_waiting[node_id] == 0]
+        heapq.heapify(ready)
+        running = []  # (end time, node id) pairs
+        demands = self.demands
+        free_slots = self.num_slots
+        free = [self.capacity[resource_name] for resource_name in self.resource_names]
+        begins = [0] * num_nodes
+        now = 0
+        while ready or running:
+            passed_over = []
+            while ready and free_slots != 0:
+                item = heapq.heappop(ready)
+                node_id = order[item[1]]
+                if demands is not None:
+                    demand = demands[node_id]
+                    if any([amount > available for amount, available in zip(demand, free)]):
+                        passed_over.append(item)
+                        if len(passed_over) > self.lookahead:
+                            break
+                        continue
+                    free = [available - amount for amount, available in zip(demand, free)]
+                if free_slots is not None:
+                    free_slots -= 1
+                begins[node_id] = now
+                heapq.heappush(running, (now + durations[node_id], node_id))
+            for item in passed_over:
+                heapq.heappush(ready, item)
+            # Finish the next component, and any that finish at the same time.
+            now = running[0][0]
+            while running and running[0][0] == now:
+                _, node_id = heapq.heappop(running)
+                if free_slots is not None:
+                    free_slots += 1
+                if demands is not None:
+                    free = [available + amount
+                            for amount, available in zip(demands[node_id], free)]
+                for succ_id in succ_ids[succ_offsets[node_id]:succ_offsets[node_id + 1]]:
+                    num_waiting[succ_id] -= 1
+                    if num_waiting[succ_id] == 0:
+                        heapq.heappush(ready, (-priorities[succ_id], positions[succ_id]))
+        return ListScheduleResult(
+            self.get_startStopInfoByName(begins, durations, dependency_direction),
+            timedelta(microseconds=now),
+            self.get_utilization(durations, now))
+
+    def get_startStopInfoByName(self, begins, durations, dependency_direction):
+        startStopInfoByName = {}
+        for name, begin, duration in zip(self.index.names, begins, durations):
+            if dependency_direction == DependencyDirection.STARTUP:
+                startStopInfoByName[name] = {
+                    BEGIN_STARTUP_KEY  : timedelta(microseconds=begin),
+                    END_STARTUP_KEY    : timedelta(microseconds=begin + duration)
+                    }
+            else:
+                startStopInfoByName[name] = {
+                    BEGIN_SHUTDOWN_KEY : timedelta(microseconds=-begin - duration),
+                    END_SHUTDOWN_KEY   : timedelta(microseconds=-begin)
+                    }
+        return startStopInfoByName
+
+    def get_utilization(self, durations, makespan):
+        """Return the dictionary of utilizations for ListScheduleResult."""
+        utilization = {}
+        if self.num_slots is not None:
+            utilization['slots'] = 0.0
+            if makespan:
+                utilization['slots'] = float(sum(durations)) / (self.num_slots * makespan)
+        for k, resource_name in enumerate(self.resource_names):
+            capacity = self.capacity[resource_name]
+            utilization[resource_name] = 0.0
+            if makespan and capacity:
+                usage = sum([duration * demand[k]
+                             for duration, demand in zip(durations, self.demands)])
+                utilization[resource_name] = float(usage) / (capacity * makespan)
+        return utilization
+
+class CapacityPlanner(object):
+    """Answers capacity questions about startup or shutdown with limited slots,
+    such as the smallest number of slots that meets a deadline."""
+    def __init__(self, dgraph):
+        """@param: dgraph: An (acyclic) DependencyGraph, which should not be
+            changed afterward."""
+        self.scheduler = ListScheduler(dgraph, num_slots=1)
+
+    def lower_bounds(self, num_slots, dependency_direction=DependencyDirection.STARTUP):
+        """Return (critical_path, work_bound): no schedule with num_slots slots
+        takes less time than the longest chain of components, or than the total
+        duration of the components divided by num_slots.
+        @throws ValueError"""
+        list_strategy = self.scheduler.get_list_strategy(dependency_direction)
+        critical_path = max(list_strategy['priorities'] or [0])
+        total_work = sum(list_strategy['durations'])
+        work_bound = -(-total_work // num_slots)  # Rounded up
+        return timedelta(microseconds=critical_path), timedelta(microseconds=work_bound)
+
+    def schedule(self, num_slots, dependency_direction=DependencyDirection.STARTUP):
+        """Return the ListScheduleResult for num_slots slots."""
+        self.scheduler.num_slots = num_slots
+        return self.scheduler.schedule(dependency_direction)
+
+    def min_slots(self, deadline, dependency_direction=DependencyDirection.STARTUP):
+        """Return (num_slots, result): the smallest number of slots for which
+        the list schedule takes at most "deadline" (a timedelta), and its
+        ListScheduleResult.  The lower bounds rule out the smaller numbers of
+        slots without scheduling them; then the number of slots is doubled
+        until the deadline is met, and a binary search finds the smallest.
+        (List scheduling can, rarely, take longer with more slots, so a
+        smaller number that happens to meet the deadline may be missed.)
+        @throws ValueError if the deadline is shorter than the critical path,
+            which no number of slots can beat."""
+        critical_path, _ = self.lower_bounds(1, dependency_direction)
+        if critical_path > deadline:
+            raise ValueError('The deadline (%s) is shorter than the critical path (%s)'
+                             % (deadline, critical_path))
+        list_strategy = self.scheduler.get_list_strategy(dependency_direction)
+        total_work = sum(list_strategy['durations'])
+        deadline_us = deadline // MICROSECOND
+        low = 1
+        if deadline_us > 0:
+            low = max(1, -(-total_work // deadline_us))
+        # With one slot per component, every component starts as soon as it is
+        # ready, so the makespan is the critical path, which meets the deadline.
+        most = max(1, self.scheduler.index.num_nodes())
+        high = min(low, most)
+        result = self.schedule(high, dependency_direction)
+        while result.makespan > deadline:
+            low = high + 1
+            high = min(2 * high, most)
+            result = self.schedule(high, dependency_direction)
+        while low < high:
+            middle = (low + high) // 2
+            middle_result = self.schedule(middle, dependency_direction)
+            if middle_result.makespan <= deadline:
+                high, result = middle, middle_result
+            else:
+                low = middle + 1
+        return high, result
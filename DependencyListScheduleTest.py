@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from datetime import timedelta
+import DependencyGraph
+import DependencyListSchedule
+import DependencyGraphTest
+import unittest
+
+class FourNodeDiamondListSchedule(DependencyGraphTest.FourNodeDiamondBase):
+    def begin_minutes(self, result, key=DependencyGraph.BEGIN_STARTUP_KEY):
+        return dict([(name, info[key] // timedelta(minutes=1))
+                     for name, info in result.startStopInfoByName.items()])
+    def test_one_slot(self):
+        scheduler = DependencyListSchedule.ListScheduler(self.dgraph, num_slots=1)
+        result = scheduler.schedule()
+        # c heads a longer chain than b does, so it starts first.
+        self.assertEqual(self.begin_minutes(result), {'a': 0, 'c': 1, 'b': 5, 'd': 7})
+        self.assertEqual(result.makespan, timedelta(minutes=11))
+        self.assertEqual(result.utilization, {'slots': 1.0})
+    def test_two_slots(self):
+        scheduler = DependencyListSchedule.ListScheduler(self.dgraph, num_slots=2)
+        result = scheduler.schedule()
+        self.dgraph.set_startStopInfoByName()
+        self.assertEqual(result.startStopInfoByName, self.dgraph.startStopInfoByName)
+        self.assertEqual(result.makespan, timedelta(minutes=9))
+    def test_shutdown(self):
+        scheduler = DependencyListSchedule.ListScheduler(self.dgraph, num_slots=1)
+        result = scheduler.schedule(DependencyGraph.DependencyDirection.SHUTDOWN)
+        self.assertEqual(self.begin_minutes(result, DependencyGraph.BEGIN_SHUTDOWN_KEY),
+                         {'d': -8, 'c': -12, 'b': -14, 'a': -15})
+        self.assertEqual(result.makespan, timedelta(minutes=15))
+    def test_capacity(self):
+        for name, cpus in [('b', 2), ('c', 2), ('d', 1)]:
+            self.comps[name][DependencyGraph.DEMAND_KEY] = {'cpu': cpus}
+        scheduler = DependencyListSchedule.ListScheduler(self.dgraph, capacity={'cpu': 2})
+        result = scheduler.schedule()
+        self.assertEqual(self.begin_minutes(result), {'a': 0, 'c': 1, 'b': 5, 'd': 7})
+        self.assertEqual(result.utilization['cpu'], 16.0 / 22)
+    def test_excessive_demand(self):
+        self.comps['d'][DependencyGraph.DEMAND_KEY] = {'cpu': 3}
+        self.assertRaises(ValueError, DependencyListSchedule.ListScheduler,
+                          self.dgraph, capacity={'cpu': 2})
+        self.assertRaises(ValueError, DependencyListSchedule.ListScheduler, self.dgraph)
+
+class FourNodeDiamondCapacityPlanner(DependencyGraphTest.FourNodeDiamondBase):
+    def setUp(self):
+        DependencyGraphTest.FourNodeDiamondBase.setUp(self)
+        self.planner = DependencyListSchedule.CapacityPlanner(self.dgraph)
+    def test_lower_bounds(self):
+        self.assertEqual(self.planner.lower_bounds(2),
+                         (timedelta(minutes=9), timedelta(minutes=5.5)))
+    def test_min_slots(self):
+        num_slots, result = self.planner.min_slots(timedelta(minutes=10))
+        self.assertEqual(num_slots, 2)
+        self.assertEqual(result.makespan, timedelta(minutes=9))
+        num_slots, result = self.planner.min_slots(timedelta(minutes=11))
+        self.assertEqual(num_slots, 1)
+        self.assertEqual(result.makespan, timedelta(minutes=11))
+    def test_impossible_deadline(self):
+        self.assertRaises(ValueError, self.planner.min_slots, timedelta(minutes=8))
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Runs an action (e.g., "start the service") for each component of a
+DependencyGraph, in parallel, in the order used by set_startStopInfoByName():
+each action is submitted as soon as the actions of all the components that it
+waits for have finished.  The actual begin and end times are recorded in a
+dictionary with the same shape as DependencyGraph.startStopInfoByName.
+DependencyOrchestrator runs ordinary callables on a thread or process pool,
+and AsyncDependencyOrchestrator awaits coroutines on a single event loop."""
+
+import asyncio
+import functools
+import time
+
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from datetime import timedelta
+
+from DependencyGraph import (BEGIN_SHUTDOWN_KEY, BEGIN_STARTUP_KEY,
+                             END_SHUTDOWN_KEY, END_STARTUP_KEY,
+                             DependencyDirection)
+
+class DependencyLaunchException(Exception):
+    """Represents the failure of the actions of one or more components.
+    The components that wait for a failed one are not launched.
+    @ivar failures: A dictionary of the exceptions raised, indexed by component name.
+    @ivar startStopInfoByName: The times of the actions that did finish.
+    @ivar skipped_names: The names of the components that were not launched."""
+    def __init__(self, failures, startStopInfoByName, skipped_names=()):
+        self.failures = failures
+        self.startStopInfoByName = startStopInfoByName
+        self.skipped_names = list(skipped_names)
+        self.message = 'Error: Component action failed: ' \
+                       + ', '.join(sorted(failures.keys()))
+        Exception.__init__(self, self.message)
+
+def timed_call(action, name):
+    """Return (begin, end, result) for action(name), with wall clock times.
+    This is a module-level function, so that it can be sent to a process pool."""
+    begin = time.time()
+    result = action(name)
+    return begin, time.time(), result
+
+def get_waiting_counts(dgraph, dg_strategy):
+    """Return (num_waitingByName, ready_names), where num_waitingByName holds
+    the number of components that each component waits for, and ready_names
+    lists those that wait for none, in topological order."""
+    num_waitingByName = {}
+    ready_names = []
+    get_parents = dg_strategy['get_parents']
+    for name in dg_strategy['tsorted_names']:
+        num_waitingByName[name] = len(get_parents(dgraph.nodesByName[name]))
+        if num_waitingByName[name] == 0:
+            ready_names.append(name)
+    return num_waitingByName, ready_names
+
+def get_startStopInfoByName(timesByName, dependency_direction):
+    """Return the dictionary returned by the run() methods, given a dictionary
+    of (begin, end) pairs in seconds since the beginning of the run."""
+    startStopInfoByName = {}
+    if dependency_direction == DependencyDirection.STARTUP:
+        for name, (begin, end) in timesByName.items():
+            startStopInfoByName[name] = {
+                BEGIN_STARTUP_KEY  : timedelta(seconds=begin),
+                END_STARTUP_KEY    : timedelta(seconds=end)
+                }
+    else:
+        run_end = max([end for _, end in timesByName.values()] or [0])
+        for name, (begin, end) in timesByName.items():
+            startStopInfoByName[name] = {
+                BEGIN_SHUTDOWN_KEY : timedelta(seconds=begin - run_end),
+                END_SHUTDOWN_KEY   : timedelta(seconds=end - run_end)
+                }
+    return startStopInfoByName
+
+def check_results(num_waitingByName, timesByName, failures, dependency_direction):
+    """Return the dictionary returned by the run() methods.
+    @throws DependencyLaunchException if there are failures."""
+    startStopInfoByName = get_startStopInfoByName(timesByName, dependency_direction)
+    if failures:
+        skipped_names = [name for name in num_waitingByName
+                         if name not in timesByName and name not in failures]
+        raise DependencyLaunchException(failures, startStopInfoByName, skipped_names)
+    return startStopInfoByName
+
+class DependencyOrchestrator(object):
+    """Launches the actions of the components of a DependencyGraph on a thread
+    pool or a process pool.  The graph should not be changed during a run."""
+    def __init__(self, dgraph, max_workers=None, use_processes=False):
+        """@param: dgraph: An (acyclic) DependencyGraph.
+        @param: max_workers: The maximum number of actions run at once.
+            Defaults to the default of the executor.
+        @param: use_processes: If True, use a ProcessPoolExecutor, so the actions
+            and their results must be picklable.  Otherwise, use a ThreadPoolExecutor."""
+        self.dgraph = dgraph
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+
+    def get_executor(self):
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def run(self, action, dependency_direction=DependencyDirection.STARTUP):
+        """Call action(name) for each component, and return a dictionary of the
+        times at which the actions began and ended, relative to the beginning
+        of the run, indexed by component name.  For startup, the keys are
+        BEGIN_STARTUP_KEY and END_STARTUP_KEY.  For shutdown, they are
+        BEGIN_SHUTDOWN_KEY and END_SHUTDOWN_KEY, and, as in
+        startStopInfoByName, the times are relative to the end of the run,
+        so they are not positive.
+        If an action raises an exception, the components that wait for it
+        (directly or indirectly) are not launched, but the other components
+        are, as with AsyncDependencyOrchestrator.run().
+        @throws DependencyLaunchException if any action raises an exception,
+            once all the actions that could be launched have finished.
+        @throws ValueError"""
+        dg_strategy = self.dgraph.get_schedule_strategy(dependency_direction)
+        nodesByName = self.dgraph.nodesByName
+        get_children = dg_strategy['get_children']
+        num_waitingByName, ready_names = get_waiting_counts(self.dgraph, dg_strategy)
+        timesByName = {}
+        failures = {}
+        nameByFuture = {}
+        with self.get_executor() as executor:
+            run_begin = time.time()
+            while ready_names or nameByFuture:
+                # The components that wait for a failed one never become ready.
+                for name in ready_names:
+                    nameByFuture[executor.submit(timed_call, action, name)] = name
+                ready_names = []
+                if not nameByFuture:
+                    break
+                done, _ = wait(list(nameByFuture.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = nameByFuture.pop(future)
+                    try:
+                        begin, end, _ = future.result()
+                    except Exception as e:
+                        failures[name] = e
+                        continue
+                    timesByName[name] = (begin - run_begin, end - run_begin)
+                    for child_name in get_children(nodesByName[name]):
+                        num_waitingByName[child_name] -= 1
+                        if num_waitingByName[child_name] == 0:
+                            ready_names.append(child_name)
+        return check_results(num_waitingByName, timesByName, failures,
+                             dependency_direction)
+
+class AsyncDependencyOrchestrator(object):
+    """Awaits a coroutine hook for each component of a DependencyGraph,
+    on the running event loop.  A task is only created for a component once
+    all the components that it waits for have finished, so that even very
+    large graphs need few tasks at once.  The graph should not be changed
+    during a run."""
+    def __init__(self, dgraph, max_concurrency=None, timeout=None, timeoutByName=None):
+        """@param: dgraph: An (acyclic) DependencyGraph.
+        @param: max_concurrency: The maximum number of hooks awaited at once,
+            or None for no limit.
+        @param: timeout: The number of seconds after which a hook is cancelled
+            and counted as failed (with asyncio.TimeoutError), or None.
+        @param: timeoutByName: A dictionary of timeouts that override "timeout"
+            for individual components."""
+        self.dgraph = dgraph
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.timeoutByName = timeoutByName or {}
+
+    async def timed_await(self, hook, name, semaphore, loop):
+        """Return (begin, end) in loop time, for awaiting hook(name)."""
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            begin = loop.time()
+            await asyncio.wait_for(hook(name), self.timeoutByName.get(name, self.timeout))
+            return begin, loop.time()
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    async def run(self, hook, dependency_direction=DependencyDirection.STARTUP):
+        """Await hook(name) for each component, and return a dictionary of the
+        times at which the hooks began and ended, as DependencyOrchestrator.run() does.
+        If a hook fails or times out, the components that wait for it (directly
+        or indirectly) are not launched, but the other components are.
+        If run() itself is cancelled, the hooks being awaited are cancelled.
+        @throws DependencyLaunchException if any hook fails.
+        @throws ValueError"""
+        loop = asyncio.get_running_loop()
+        dg_strategy = self.dgraph.get_schedule_strategy(dependency_direction)
+        nodesByName = self.dgraph.nodesByName
+        get_children = dg_strategy['get_children']
+        num_waitingByName, ready_names = get_waiting_counts(self.dgraph, dg_strategy)
+        semaphore = None
+        if self.max_concurrency is not None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+        timesByName = {}
+        failures = {}
+        tasks = set()
+        all_done = loop.create_future()
+        run_begin = loop.time()
+
+        def launch(name):
+            task = loop.create_task(self.timed_await(hook, name, semaphore, loop))
+            tasks.add(task)
+            task.add_done_callback(functools.partial(on_done, name))
+
+        def on_done(name, task):
+            tasks.discard(task)
+            if task.cancelled():
+                failures[name] = asyncio.CancelledError()
+            elif task.exception() is not None:
+                failures[name] = task.exception()
+            else:
+                begin, end = task.result()
+                timesByName[name] = (begin - run_begin, end - run_begin)
+                for child_name in get_children(nodesByName[name]):
+                    num_waitingByName[child_name] -= 1
+                    if num_waitingByName[child_name] == 0:
+                        launch(child_name)
+            if not tasks and not all_done.done():
+                all_done.set_result(None)
+
+        for name in ready_names:
+            launch(name)
+        if tasks:
+            try:
+                await all_done
+            except asyncio.CancelledError:
+                for task in list(tasks):
+                    task.cancel()
+                raise
+        return check_results(num_waitingByName, timesByName, failures,
+                             dependency_direction)
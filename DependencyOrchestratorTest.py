@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from datetime import timedelta
+import asyncio
+import threading
+import time
+import DependencyGraph
+import DependencyOrchestrator
+import DependencyGraphTest
+import unittest
+
+class RecordingAction(object):
+    """Sleeps briefly, and records the order of the calls and the largest
+    number of calls running at once."""
+    def __init__(self, failing_names=(), delayByName=None):
+        self.failing_names = failing_names
+        self.delayByName = delayByName or {}
+        self.lock = threading.Lock()
+        self.names = []
+        self.num_running = 0
+        self.max_running = 0
+    def __call__(self, name):
+        with self.lock:
+            self.names.append(name)
+            self.num_running += 1
+            self.max_running = max(self.max_running, self.num_running)
+        time.sleep(self.delayByName.get(name, 0.01))
+        with self.lock:
+            self.num_running -= 1
+        if name in self.failing_names:
+            raise RuntimeError('Cannot start ' + name)
+        return name
+
+class FourNodeDiamondRun(DependencyGraphTest.FourNodeDiamondBase):
+    def assert_respects_dependencies(self, startStopInfoByName, direction):
+        begin_key, end_key = (DependencyGraph.BEGIN_STARTUP_KEY,
+                              DependencyGraph.END_STARTUP_KEY)
+        if direction == DependencyGraph.DependencyDirection.SHUTDOWN:
+            begin_key, end_key = (DependencyGraph.BEGIN_SHUTDOWN_KEY,
+                                  DependencyGraph.END_SHUTDOWN_KEY)
+        for name, node in self.dgraph.nodesByName.items():
+            for child_name in node.children:
+                first, second = name, child_name
+                if direction == DependencyGraph.DependencyDirection.SHUTDOWN:
+                    first, second = child_name, name
+                self.assertTrue(startStopInfoByName[first][end_key]
+                                <= startStopInfoByName[second][begin_key])
+
+class FourNodeDiamondOrchestrator(FourNodeDiamondRun):
+    def test_startup(self):
+        action = RecordingAction()
+        orchestrator = DependencyOrchestrator.DependencyOrchestrator(
+            self.dgraph, max_workers=4)
+        startStopInfoByName = orchestrator.run(action)
+        self.assertEqual(sorted(startStopInfoByName.keys()), ['a', 'b', 'c', 'd'])
+        self.assertEqual(action.names[0], 'a')
+        self.assertEqual(action.names[-1], 'd')
+        self.assertEqual(action.max_running, 2)
+        self.assert_respects_dependencies(startStopInfoByName,
+                                          DependencyGraph.DependencyDirection.STARTUP)
+    def test_shutdown(self):
+        action = RecordingAction()
+        orchestrator = DependencyOrchestrator.DependencyOrchestrator(
+            self.dgraph, max_workers=1)
+        shutdown = DependencyGraph.DependencyDirection.SHUTDOWN
+        startStopInfoByName = orchestrator.run(action, shutdown)
+        self.assertEqual(action.names[0], 'd')
+        self.assertEqual(action.max_running, 1)
+        self.assertEqual(
+            startStopInfoByName['a'][DependencyGraph.END_SHUTDOWN_KEY].total_seconds(), 0)
+        self.assert_respects_dependencies(startStopInfoByName, shutdown)
+    def test_failure(self):
+        action = RecordingAction(failing_names=['b'])
+        orchestrator = DependencyOrchestrator.DependencyOrchestrator(self.dgraph)
+        try:
+            orchestrator.run(action)
+            self.fail('DependencyLaunchException not raised')
+        except DependencyOrchestrator.DependencyLaunchException as e:
+            self.assertEqual(list(e.failures.keys()), ['b'])
+            self.assertEqual(sorted(e.startStopInfoByName.keys()), ['a', 'c'])
+            self.assertEqual(e.skipped_names, ['d'])
+        self.assertTrue('d' not in action.names)
+    def test_failure_independent(self):
+        # e only waits for c, which finishes after b has failed.
+        self.dgraph.add_component('e', self.comps['a'])
+        self.dgraph.add_dependency('c', 'e')
+        action = RecordingAction(failing_names=['b'], delayByName={'c': 0.2})
+        orchestrator = DependencyOrchestrator.DependencyOrchestrator(self.dgraph)
+        try:
+            orchestrator.run(action)
+            self.fail('DependencyLaunchException not raised')
+        except DependencyOrchestrator.DependencyLaunchException as e:
+            self.assertEqual(sorted(e.startStopInfoByName.keys()), ['a', 'c', 'e'])
+            self.assertEqual(e.skipped_names, ['d'])
+    def test_process_pool(self):
+        orchestrator = DependencyOrchestrator.DependencyOrchestrator(
+            self.dgraph, max_workers=2, use_processes=True)
+        startStopInfoByName = orchestrator.run(str.upper)
+        self.assert_respects_dependencies(startStopInfoByName,
+                                          DependencyGraph.DependencyDirection.STARTUP)
+
+class AsyncRecordingHook(object):
+    """The coroutine counterpart of RecordingAction."""
+    def __init__(self, delayByName=None):
+        self.delayByName = delayByName or {}
+        self.names = []
+        self.num_running = 0
+        self.max_running = 0
+    async def __call__(self, name):
+        self.names.append(name)
+        self.num_running += 1
+        self.max_running = max(self.max_running, self.num_running)
+        try:
+            await asyncio.sleep(self.delayByName.get(name, 0.001))
+        finally:
+            self.num_running -= 1
+
+class FourNodeDiamondAsyncOrchestrator(FourNodeDiamondRun):
+    def test_startup(self):
+        hook = AsyncRecordingHook()
+        orchestrator = DependencyOrchestrator.AsyncDependencyOrchestrator(self.dgraph)
+        startStopInfoByName = asyncio.run(orchestrator.run(hook))
+        self.assertEqual(hook.names[0], 'a')
+        self.assertEqual(hook.names[-1], 'd')
+        self.assertEqual(hook.max_running, 2)
+        self.assert_respects_dependencies(startStopInfoByName,
+                                          DependencyGraph.DependencyDirection.STARTUP)
+    def test_shutdown(self):
+        hook = AsyncRecordingHook()
+        orchestrator = DependencyOrchestrator.AsyncDependencyOrchestrator(
+            self.dgraph, max_concurrency=1)
+        shutdown = DependencyGraph.DependencyDirection.SHUTDOWN
+        startStopInfoByName = asyncio.run(orchestrator.run(hook, shutdown))
+        self.assertEqual(hook.names[0], 'd')
+        self.assertEqual(hook.max_running, 1)
+        self.assert_respects_dependencies(startStopInfoByName, shutdown)
+    def test_failure(self):
+        # b times out, so d is never launched, but c still is.
+        hook = AsyncRecordingHook(delayByName={'b': 10})
+        orchestrator = DependencyOrchestrator.AsyncDependencyOrchestrator(
+            self.dgraph, timeout=1, timeoutByName={'b': 0.01})
+        try:
+            asyncio.run(orchestrator.run(hook))
+            self.fail('DependencyLaunchException not raised')
+        except DependencyOrchestrator.DependencyLaunchException as e:
+            self.assertEqual(list(e.failures.keys()), ['b'])
+            self.assertTrue(isinstance(e.failures['b'], asyncio.TimeoutError))
+            self.assertEqual(sorted(e.startStopInfoByName.keys()), ['a', 'c'])
+            self.assertEqual(e.skipped_names, ['d'])
+
+class WideGraphAsyncOrchestrator(unittest.TestCase):
+    def setUp(self):
+        comps = dict([(str(i), {DependencyGraph.START_KEY: timedelta(seconds=1),
+                                DependencyGraph.STOP_KEY: timedelta(seconds=1)})
+                      for i in range(5001)])
+        deps = [{DependencyGraph.COMPONENT_KEY: '0',
+                 DependencyGraph.REQUIREMENT_KEY: str(i)} for i in range(1, 5001)]
+        self.dgraph = DependencyGraph.DependencyGraph(comps, deps, is_compact=True)
+    def test_max_concurrency(self):
+        hook = AsyncRecordingHook()
+        orchestrator = DependencyOrchestrator.AsyncDependencyOrchestrator(
+            self.dgraph, max_concurrency=100)
+        startStopInfoByName = asyncio.run(orchestrator.run(hook))
+        self.assertEqual(len(startStopInfoByName), 5001)
+        self.assertEqual(hook.max_running, 100)
+
+if __name__=='__main__':
+    unittest.main()
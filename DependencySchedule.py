@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Vectorized computation of startup and shutdown times, using NumPy.
+Durations and times are int64 arrays of milliseconds, indexed by the node ids
+of a DependencyIndex.  The nodes are split into levels, so that each node only
+waits for nodes in earlier levels.  The reference times of all the nodes in a
+level are then computed with a single segmented reduction (np.maximum.reduceat
+or np.minimum.reduceat) over their CSR predecessor arrays.
+The durations can also be a K x V matrix, with one row per "what-if" scenario,
+in which case all K schedules are computed in the same pass over the levels.
+MonteCarloSimulation uses the same pass to sample schedules from duration
+distributions attached to the components."""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, but ArrayScheduler requires it.
+    np = None
+
+from datetime import timedelta
+
+from DependencyGraph import (BEGIN_SHUTDOWN_KEY, BEGIN_STARTUP_KEY,
+                             END_SHUTDOWN_KEY, END_STARTUP_KEY,
+                             START_DISTRIBUTION_KEY, START_KEY,
+                             STOP_DISTRIBUTION_KEY, STOP_KEY,
+                             DependencyDirection)
+
+MILLISECOND = timedelta(milliseconds=1)
+
+def csr_gather(offsets, targets, node_ids):
+    """Return (gathered, counts), where gathered is the concatenation of the
+    CSR rows of the given nodes, and counts holds the length of each row."""
+    starts = offsets[node_ids]
+    counts = offsets[node_ids + 1] - starts
+    row_starts = np.cumsum(counts) - counts
+    positions = np.repeat(starts - row_starts, counts) + np.arange(counts.sum())
+    return targets[positions], counts
+
+class ScheduleLevel(object):
+    """The nodes of one level, and the (concatenated) ids of their predecessors.
+    The predecessors of node_ids[k] start at pred_ids[row_starts[k]]."""
+    def __init__(self, node_ids, pred_ids, row_starts):
+        self.node_ids = node_ids
+        self.pred_ids = pred_ids
+        self.row_starts = row_starts
+        self.degree_groups = None  # Built on demand by get_degree_groups()
+
+    def get_degree_groups(self):
+        """Return a list of (positions, pred_ids) pairs, one for each number d of
+        predecessors, where positions are the positions in node_ids of the
+        nodes with d predecessors, and pred_ids is the matrix of their ids."""
+        if self.degree_groups is None:
+            counts = np.diff(self.row_starts, append=len(self.pred_ids))
+            self.degree_groups = []
+            for degree in np.unique(counts):
+                positions = np.flatnonzero(counts == degree)
+                pred_ids = self.pred_ids[self.row_starts[positions][:, None]
+                                         + np.arange(degree)]
+                self.degree_groups.append((positions, pred_ids))
+        return self.degree_groups
+
+    def reduce(self, extremum, times):
+        """Return the extremum (np.maximum or np.minimum) of the times of the
+        predecessors of each node in this level.
+        @param: times: An array of length V, or a V x K matrix."""
+        if times.ndim == 1:
+            return extremum.reduceat(times[self.pred_ids], self.row_starts)
+        # reduceat is slow along the first axis of a matrix, so instead
+        # reduce the nodes with the same number of predecessors together.
+        result = np.empty((len(self.node_ids),) + times.shape[1:], dtype=times.dtype)
+        for positions, pred_ids in self.get_degree_groups():
+            result[positions] = extremum.reduce(times[pred_ids], axis=1)
+        return result
+
+class ArrayScheduler(object):
+    """Computes the same start/stop times as DependencyGraph.set_startStopInfoByName(),
+    but for all the nodes of a level at once.  The levels are computed once,
+    when the ArrayScheduler is created, so the DependencyGraph should not be
+    changed afterward.  Times are rounded down to whole milliseconds."""
+    def __init__(self, dgraph):
+        """@param: dgraph: An (acyclic) DependencyGraph.
+        @throws ImportError if NumPy is not installed."""
+        if np is None:
+            raise ImportError('ArrayScheduler requires NumPy')
+        index = dgraph.get_index()
+        self.dgraph = dgraph
+        self.names = index.names
+        self.idByName = index.idByName
+        self.num_nodes = index.num_nodes()
+        self.child_offsets = np.asarray(index.child_offsets).astype(np.int64)
+        self.child_ids = np.asarray(index.child_ids).astype(np.int64)
+        self.parent_offsets = np.asarray(index.parent_offsets).astype(np.int64)
+        self.parent_ids = np.asarray(index.parent_ids).astype(np.int64)
+        # Startup waits for parents; shutdown waits for children.
+        self.startup_levels = self.get_levels(
+            self.parent_offsets, self.parent_ids, self.child_offsets, self.child_ids)
+        self.shutdown_levels = self.get_levels(
+            self.child_offsets, self.child_ids, self.parent_offsets, self.parent_ids)
+
+    def get_levels(self, pred_offsets, pred_ids, succ_offsets, succ_ids):
+        """Return a list of ScheduleLevels.  The first level holds the nodes
+        without predecessors, and each later level holds the nodes whose
+        predecessors are all in earlier levels."""
+        levels = []
+        num_waiting = np.diff(pred_offsets)
+        node_ids = np.flatnonzero(num_waiting == 0)
+        while node_ids.size:
+            level_pred_ids, counts = csr_gather(pred_offsets, pred_ids, node_ids)
+            levels.append(ScheduleLevel(node_ids, level_pred_ids,
+                                        np.cumsum(counts) - counts))
+            succs, _ = csr_gather(succ_offsets, succ_ids, node_ids)
+            np.subtract.at(num_waiting, succs, 1)
+            succs = np.unique(succs)
+            node_ids = succs[num_waiting[succs] == 0]
+        return levels
+
+    def get_durations(self, key):
+        """Return an int64 array of the durations (in milliseconds) of the
+        components, with the given key (START_KEY or STOP_KEY)."""
+        get_attributes = self.dgraph.get_attributes
+        return np.array([get_attributes(name)[key] // MILLISECOND
+                         for name in self.names], dtype=np.int64)
+
+    def batch_durations(self, names, factor, key=START_KEY):
+        """Return a K x V matrix of durations for a one-at-a-time sensitivity sweep.
+        Row k holds get_durations(key), except that the duration of names[k]
+        is multiplied by factor (e.g., 0.8 for "20% faster")."""
+        durations = np.tile(self.get_durations(key), (len(names), 1))
+        node_ids = np.array([self.idByName[name] for name in names], dtype=np.int64)
+        rows = np.arange(len(names))
+        durations[rows, node_ids] = np.rint(
+            durations[rows, node_ids] * factor).astype(np.int64)
+        return durations
+
+    def startup_times(self, durations=None):
+        """Return (begin, end), the arrays of the beginning and end of startup.
+        @param: durations: The startup durations in milliseconds, as an array
+            of length V, or a K x V matrix.  The results have the same shape.
+            Defaults to get_durations(START_KEY)."""
+        if durations is None:
+            durations = self.get_durations(START_KEY)
+        # Keep the node axis first, so that gathering the times of the
+        # predecessors copies contiguous rows of K values.
+        begin, end = self.startup_times_by_node(
+            np.ascontiguousarray(np.asarray(durations, dtype=np.int64).T))
+        return begin.T, end.T
+
+    def startup_times_by_node(self, durations):
+        """Like startup_times(), but the durations and results are V x K matrices
+        (or arrays of length V), with the node axis first."""
+        begin = np.zeros(durations.shape, dtype=durations.dtype)
+        end = np.zeros(durations.shape, dtype=durations.dtype)
+        for level in self.startup_levels:
+            if level.pred_ids.size:
+                begin[level.node_ids] = level.reduce(np.maximum, end)
+            end[level.node_ids] = begin[level.node_ids] + durations[level.node_ids]
+        return begin, end
+
+    def shutdown_times(self, durations=None):
+        """Return (begin, end), the arrays of the beginning and end of shutdown.
+        The shutdown is completed at time zero, so the times are not positive.
+        @param: durations: The shutdown durations in milliseconds, as an array
+            of length V, or a K x V matrix.  The results have the same shape.
+            Defaults to get_durations(STOP_KEY)."""
+        if durations is None:
+            durations = self.get_durations(STOP_KEY)
+        begin, end = self.shutdown_times_by_node(
+            np.ascontiguousarray(np.asarray(durations, dtype=np.int64).T))
+        return begin.T, end.T
+
+    def shutdown_times_by_node(self, durations):
+        """Like shutdown_times(), but the durations and results are V x K matrices
+        (or arrays of length V), with the node axis first."""
+        begin = np.zeros(durations.shape, dtype=durations.dtype)
+        end = np.zeros(durations.shape, dtype=durations.dtype)
+        for level in self.shutdown_levels:
+            if level.pred_ids.size:
+                end[level.node_ids] = level.reduce(np.minimum, begin)
+            begin[level.node_ids] = end[level.node_ids] - durations[level.node_ids]
+        return begin, end
+
+    def schedule(self, dependency_direction=DependencyDirection.STARTUP, durations=None):
+        """Return (begin, end) for the given DependencyDirection.
+        @throws ValueError"""
+        if dependency_direction == DependencyDirection.STARTUP:
+            return self.startup_times(durations)
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            return self.shutdown_times(durations)
+        raise ValueError('Unknown DependencyDirection value, %s'
+                         % dependency_direction)
+
+    def slack(self, dependency_direction=DependencyDirection.STARTUP, durations=None):
+        """Return the slack of each component (see DependencyGraph.set_slackInfoByName()),
+        with the same shape as the durations.  The components with zero slack
+        are on a critical path.
+        @param: durations: As for startup_times() or shutdown_times().
+        @throws ValueError"""
+        if durations is None:
+            key = START_KEY if dependency_direction == DependencyDirection.STARTUP else STOP_KEY
+            durations = self.get_durations(key)
+        durations = np.ascontiguousarray(np.asarray(durations, dtype=np.int64).T)
+        if dependency_direction == DependencyDirection.STARTUP:
+            begin, end = self.startup_times_by_node(durations)
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            begin, end = self.shutdown_times_by_node(durations)
+        else:
+            raise ValueError('Unknown DependencyDirection value, %s'
+                             % dependency_direction)
+        return self.slack_by_node(durations, begin, end, dependency_direction).T
+
+    def slack_by_node(self, durations, begin, end, dependency_direction):
+        """Like slack(), but the durations, the times returned by
+        startup_times_by_node() or shutdown_times_by_node(), and the result
+        are V x K matrices (or arrays of length V), with the node axis first."""
+        # Walk the levels of the opposite direction, to visit each component
+        # after all those that wait for it.  Shutdown times are negated, so
+        # that each component begins its work at its "wait" time.
+        if dependency_direction == DependencyDirection.STARTUP:
+            levels, wait_times, ref_times = self.shutdown_levels, begin, end
+        else:
+            levels, wait_times, ref_times = self.startup_levels, -end, -begin
+        horizon = ref_times.max(axis=0, initial=0)
+        late_wait_times = np.empty_like(wait_times)
+        for level in levels:
+            late_ref_times = horizon
+            if level.pred_ids.size:
+                late_ref_times = level.reduce(np.minimum, late_wait_times)
+            late_wait_times[level.node_ids] = late_ref_times - durations[level.node_ids]
+        return late_wait_times - wait_times
+
+    def makespans(self, begin, end,
+                  dependency_direction=DependencyDirection.STARTUP):
+        """Return the total time taken by each schedule returned by schedule():
+        a number for a single schedule, or an array of K numbers for a batch.
+        @throws ValueError"""
+        if dependency_direction == DependencyDirection.STARTUP:
+            return end.max(axis=-1, initial=0)
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            return -begin.min(axis=-1, initial=0)
+        raise ValueError('Unknown DependencyDirection value, %s'
+                         % dependency_direction)
+
+    def fill_startStopInfoByName(self, begin, end,
+                                 dependency_direction=DependencyDirection.STARTUP):
+        """Copy times returned by schedule() into the startStopInfoByName
+        dictionary of the DependencyGraph, as timedelta values.
+        Since these times are rounded to whole milliseconds, the direction is
+        then no longer one that the DependencyGraph keeps up to date, so that
+        update_startStopInfoByName() does not mix them with exact times, and
+        the next set_startStopInfoByName() recomputes them all.
+        @throws ValueError"""
+        if dependency_direction == DependencyDirection.STARTUP:
+            begin_key, end_key = BEGIN_STARTUP_KEY, END_STARTUP_KEY
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            begin_key, end_key = BEGIN_SHUTDOWN_KEY, END_SHUTDOWN_KEY
+        else:
+            raise ValueError('Unknown DependencyDirection value, %s'
+                             % dependency_direction)
+        startStopInfoByName = self.dgraph.startStopInfoByName
+        for name, begin_ms, end_ms in zip(self.names, begin.tolist(), end.tolist()):
+            startStopInfoByName.setdefault(name, {}).update({
+                begin_key : timedelta(milliseconds=begin_ms),
+                end_key   : timedelta(milliseconds=end_ms)
+                })
+        self.dgraph.scheduledDirections.discard(dependency_direction)
+        self.dgraph.slackDirections.discard(dependency_direction)
+
+class LognormalDistribution(object):
+    """A duration whose logarithm is normally distributed.  Attach it to a
+    component with the START_DISTRIBUTION_KEY or STOP_DISTRIBUTION_KEY attribute."""
+    def __init__(self, median, sigma):
+        """@param: median: The median duration, as a timedelta.
+        @param: sigma: The standard deviation of the logarithm of the duration."""
+        self.median = median
+        self.sigma = sigma
+
+class EmpiricalDistribution(object):
+    """A duration drawn uniformly from a list of observed durations.  Attach it
+    to a component with the START_DISTRIBUTION_KEY or STOP_DISTRIBUTION_KEY attribute."""
+    def __init__(self, samples):
+        """@param: samples: A non-empty list of observed durations, as timedeltas."""
+        self.samples = samples
+
+class DurationSampler(object):
+    """Draws duration matrices for all components at once.  The components are
+    grouped by the kind of their distribution, and each group is sampled with a
+    single vectorized call.  Components without a distribution always take the
+    duration given by their START_KEY or STOP_KEY attribute."""
+    def __init__(self, scheduler, key, distribution_key):
+        fixed_ids, fixed_ms = [], []
+        lognormal_ids, lognormal_mus, lognormal_sigmas = [], [], []
+        empirical_ids, empirical_samples, empirical_counts = [], [], []
+        for node_id, name in enumerate(scheduler.names):
+            attributes = scheduler.dgraph.get_attributes(name)
+            distribution = attributes.get(distribution_key)
+            if distribution is None:
+                fixed_ids.append(node_id)
+                fixed_ms.append(attributes[key] // MILLISECOND)
+            elif isinstance(distribution, LognormalDistribution):
+                lognormal_ids.append(node_id)
+                lognormal_mus.append(np.log(distribution.median / MILLISECOND))
+                lognormal_sigmas.append(distribution.sigma)
+            elif isinstance(distribution, EmpiricalDistribution):
+                empirical_ids.append(node_id)
+                empirical_samples.extend([sample // MILLISECOND
+                                          for sample in distribution.samples])
+                empirical_counts.append(len(distribution.samples))
+            else:
+                raise ValueError('Unknown duration distribution for "%s": %r'
+                                 % (name, distribution))
+        self.num_nodes = scheduler.num_nodes
+        self.fixed_ids = np.array(fixed_ids, dtype=np.int64)
+        self.fixed_ms = np.array(fixed_ms, dtype=np.int64)
+        self.lognormal_ids = np.array(lognormal_ids, dtype=np.int64)
+        self.lognormal_mus = np.array(lognormal_mus, dtype=np.float64)
+        self.lognormal_sigmas = np.array(lognormal_sigmas, dtype=np.float64)
+        self.empirical_ids = np.array(empirical_ids, dtype=np.int64)
+        self.empirical_samples = np.array(empirical_samples, dtype=np.int64)
+        self.empirical_counts = np.array(empirical_counts, dtype=np.int64)
+        self.empirical_offsets = np.cumsum(self.empirical_counts) - self.empirical_counts
+
+    def sample(self, rng, num_samples):
+        """Return a V x num_samples matrix of durations, in milliseconds."""
+        durations = np.empty((self.num_nodes, num_samples), dtype=np.int64)
+        durations[self.fixed_ids] = self.fixed_ms[:, None]
+        if self.lognormal_ids.size:
+            normals = rng.standard_normal((self.lognormal_ids.size, num_samples))
+            normals *= self.lognormal_sigmas[:, None]
+            normals += self.lognormal_mus[:, None]
+            np.exp(normals, out=normals)
+            durations[self.lognormal_ids] = np.rint(normals)
+        if self.empirical_ids.size:
+            choices = rng.integers(0, self.empirical_counts[:, None],
+                                   (self.empirical_ids.size, num_samples))
+            choices += self.empirical_offsets[:, None]
+            durations[self.empirical_ids] = self.empirical_samples[choices]
+        return durations
+
+class MonteCarloResult(object):
+    """The results of MonteCarloSimulation.run().  All times are in milliseconds.
+    @ivar makespans: The total time taken by each sampled schedule.
+    @ivar makespan_percentiles: A dictionary of makespans, indexed by percentile.
+    @ivar readiness_percentiles: A V x P matrix of the percentiles (in the order
+        of "percentiles") of the time at which each component finishes.
+        Unlike makespan_percentiles, which use every sample, these are based
+        on the first num_component_samples samples only, so with more samples
+        than run()'s max_component_samples, the two can disagree slightly.
+    @ivar num_component_samples: The number of samples behind readiness_percentiles.
+    @ivar criticality_index: The fraction of the samples in which each component
+        has zero slack, i.e., is on a critical path, or None if it was not computed."""
+    def __init__(self, percentiles, makespans, readiness_percentiles,
+                 num_component_samples, criticality_index=None):
+        self.percentiles = percentiles
+        self.makespans = makespans
+        self.makespan_percentiles = dict(zip(
+            percentiles, np.percentile(makespans, percentiles).tolist()))
+        self.readiness_percentiles = readiness_percentiles
+        self.num_component_samples = num_component_samples
+        self.criticality_index = criticality_index
+
+class MonteCarloSimulation(object):
+    """Samples startup or shutdown schedules from the duration distributions
+    attached to the components (see LognormalDistribution and EmpiricalDistribution),
+    and reports percentiles of the makespan and of each component's finish time.
+    Samples are drawn and scheduled in chunks, so memory use does not grow
+    with the number of samples.  The per-component percentiles come from a
+    bounded number of samples; see MonteCarloResult."""
+    def __init__(self, scheduler, seed=None, chunk_size=256):
+        """@param: scheduler: An ArrayScheduler.
+        @param: seed: The seed for numpy.random.default_rng().
+        @param: chunk_size: The number of samples scheduled in each pass."""
+        self.scheduler = scheduler
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+
+    def run(self, num_samples,
+            dependency_direction=DependencyDirection.STARTUP,
+            percentiles=(50, 95, 99),
+            max_component_samples=1000,
+            with_criticality=False):
+        """Return a MonteCarloResult for num_samples sampled schedules.
+        @param: max_component_samples: The number of samples kept for the
+            per-component percentiles, which need V x max_component_samples
+            int64 values of memory.  The makespan percentiles use all samples,
+            but the per-component ones only use the first max_component_samples.
+        @param: with_criticality: If True, also compute the criticality index
+            of each component, which takes a second pass over each sample.
+        @throws ValueError"""
+        if num_samples < 1:
+            raise ValueError('The number of samples must be positive')
+        scheduler = self.scheduler
+        if dependency_direction == DependencyDirection.STARTUP:
+            sampler = DurationSampler(scheduler, START_KEY, START_DISTRIBUTION_KEY)
+            schedule_by_node = scheduler.startup_times_by_node
+        elif dependency_direction == DependencyDirection.SHUTDOWN:
+            sampler = DurationSampler(scheduler, STOP_KEY, STOP_DISTRIBUTION_KEY)
+            schedule_by_node = scheduler.shutdown_times_by_node
+        else:
+            raise ValueError('Unknown DependencyDirection value, %s'
+                             % dependency_direction)
+        num_component_samples = min(num_samples, max_component_samples)
+        finish_times = np.empty((scheduler.num_nodes, num_component_samples),
+                                dtype=np.int64)
+        makespans = np.empty(num_samples, dtype=np.int64)
+        num_critical = np.zeros(scheduler.num_nodes, dtype=np.int64)
+        for first in range(0, num_samples, self.chunk_size):
+            count = min(self.chunk_size, num_samples - first)
+            durations = sampler.sample(self.rng, count)
+            begin, end = schedule_by_node(durations)
+            if with_criticality:
+                slack = scheduler.slack_by_node(durations, begin, end,
+                                                dependency_direction)
+                num_critical += np.count_nonzero(slack == 0, axis=1)
+            makespans[first:first + count] = scheduler.makespans(
+                begin.T, end.T, dependency_direction)
+            if first < num_component_samples:
+                kept = min(count, num_component_samples - first)
+                finish_times[:, first:first + kept] = end[:, :kept]
+        if num_component_samples:
+            readiness_percentiles = np.percentile(finish_times, percentiles, axis=1).T
+        else:
+            readiness_percentiles = np.zeros((scheduler.num_nodes, len(percentiles)))
+        criticality_index = None
+        if with_criticality:
+            criticality_index = num_critical / num_samples
+        return MonteCarloResult(list(percentiles), makespans,
+                                readiness_percentiles, num_component_samples,
+                                criticality_index)
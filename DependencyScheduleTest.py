@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# Copyright 2011 by Jay M. Coskey
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+from datetime import timedelta
+import DependencyGraph
+import DependencySchedule
+import DependencyGraphTest
+import unittest
+
+@unittest.skipIf(DependencySchedule.np is None, 'NumPy is not installed')
+class FourNodeDiamondArraySchedule(DependencyGraphTest.FourNodeDiamondBase):
+    def setUp(self):
+        DependencyGraphTest.FourNodeDiamondBase.setUp(self)
+        self.scheduler = DependencySchedule.ArrayScheduler(self.dgraph)
+    def test_startup_times(self):
+        begin, end = self.scheduler.startup_times()
+        d = self.scheduler.idByName['d']
+        self.assertEqual(begin[d], 5 * 60 * 1000)
+        self.assertEqual(end[d], 9 * 60 * 1000)
+    def test_fill_startStopInfoByName(self):
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            self.dgraph.set_startStopInfoByName(direction)
+        expected = dict([(name, dict(info)) for name, info
+                         in self.dgraph.startStopInfoByName.items()])
+        self.dgraph.startStopInfoByName = {}
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            begin, end = self.scheduler.schedule(direction)
+            self.scheduler.fill_startStopInfoByName(begin, end, direction)
+        self.assertEqual(self.dgraph.startStopInfoByName, expected)
+        self.assertFalse(self.dgraph.scheduledDirections)
+    def test_fill_not_incremental(self):
+        # Durations below a millisecond are lost by the rounding, so the
+        #   rounded times must not be updated incrementally.
+        self.comps['c'][DependencyGraph.START_KEY] += timedelta(microseconds=500)
+        begin, end = self.scheduler.schedule()
+        self.scheduler.fill_startStopInfoByName(begin, end)
+        self.assertEqual(self.dgraph.startStopInfoByName['d'][DependencyGraph.END_STARTUP_KEY],
+                         timedelta(minutes=9))
+        self.assertEqual(self.dgraph.set_component_times('b', start_time=timedelta(minutes=3)), 0)
+        self.assertEqual(self.dgraph.ready_time('d'), timedelta(minutes=9, microseconds=500))
+
+@unittest.skipIf(DependencySchedule.np is None, 'NumPy is not installed')
+class LayeredGraphArraySchedule(unittest.TestCase):
+    def setUp(self):
+        comps = dict([(str(i), {DependencyGraph.START_KEY: timedelta(seconds=i % 7),
+                                DependencyGraph.STOP_KEY: timedelta(seconds=i % 5)})
+                      for i in range(200)])
+        deps = [{DependencyGraph.COMPONENT_KEY: str(i),
+                 DependencyGraph.REQUIREMENT_KEY: str(j)}
+                for i in range(200) for j in range(i + 1, min(200, i + 20), 3)]
+        self.dgraph = DependencyGraph.DependencyGraph(comps, deps, is_compact=True)
+    def test_matches_set_startStopInfoByName(self):
+        scheduler = DependencySchedule.ArrayScheduler(self.dgraph)
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            self.dgraph.set_startStopInfoByName(direction)
+            begin, end = scheduler.schedule(direction)
+            keys = [DependencyGraph.BEGIN_STARTUP_KEY, DependencyGraph.END_STARTUP_KEY]
+            if direction == DependencyGraph.DependencyDirection.SHUTDOWN:
+                keys = [DependencyGraph.BEGIN_SHUTDOWN_KEY, DependencyGraph.END_SHUTDOWN_KEY]
+            for name, node_id in scheduler.idByName.items():
+                info = self.dgraph.startStopInfoByName[name]
+                self.assertEqual(info[keys[0]], timedelta(milliseconds=int(begin[node_id])))
+                self.assertEqual(info[keys[1]], timedelta(milliseconds=int(end[node_id])))
+    def test_slack(self):
+        scheduler = DependencySchedule.ArrayScheduler(self.dgraph)
+        for direction in [DependencyGraph.DependencyDirection.STARTUP,
+                          DependencyGraph.DependencyDirection.SHUTDOWN]:
+            self.dgraph.set_slackInfoByName(direction)
+            slack_key = DependencyGraph.STARTUP_SLACK_KEY
+            if direction == DependencyGraph.DependencyDirection.SHUTDOWN:
+                slack_key = DependencyGraph.SHUTDOWN_SLACK_KEY
+            slack = scheduler.slack(direction)
+            for name, node_id in scheduler.idByName.items():
+                self.assertEqual(self.dgraph.startStopInfoByName[name][slack_key],
+                                 timedelta(milliseconds=int(slack[node_id])))
+
+@unittest.skipIf(DependencySchedule.np is None, 'NumPy is not installed')
+class FourNodeDiamondBatchSchedule(DependencyGraphTest.FourNodeDiamondBase):
+    def setUp(self):
+        DependencyGraphTest.FourNodeDiamondBase.setUp(self)
+        self.scheduler = DependencySchedule.ArrayScheduler(self.dgraph)
+    def test_batch_durations(self):
+        durations = self.scheduler.batch_durations(['b', 'c'], 0.5)
+        self.assertEqual(durations.shape, (2, 4))
+        self.assertEqual(durations[1, self.scheduler.idByName['c']], 2 * 60 * 1000)
+        self.assertEqual(durations[1, self.scheduler.idByName['b']], 2 * 60 * 1000)
+    def test_startup_times(self):
+        durations = self.scheduler.batch_durations(['a', 'b', 'c', 'd'], 0.5)
+        begin, end = self.scheduler.startup_times(durations)
+        self.assertEqual(begin.shape, durations.shape)
+        for k in range(len(durations)):
+            single_begin, single_end = self.scheduler.startup_times(durations[k])
+            self.assertTrue((begin[k] == single_begin).all())
+            self.assertTrue((end[k] == single_end).all())
+        # Only speeding up a, c or d shortens the startup.
+        self.assertEqual(list(self.scheduler.makespans(begin, end) // (30 * 1000)),
+                         [17, 18, 14, 14])
+
+@unittest.skipIf(DependencySchedule.np is None, 'NumPy is not installed')
+class FourNodeDiamondMonteCarlo(DependencyGraphTest.FourNodeDiamondBase):
+    def simulation(self, seed=None):
+        dgraph = DependencyGraph.DependencyGraph(self.comps, self.deps, verbosity=0)
+        scheduler = DependencySchedule.ArrayScheduler(dgraph)
+        return DependencySchedule.MonteCarloSimulation(scheduler, seed=seed, chunk_size=64)
+    def test_fixed_durations(self):
+        result = self.simulation().run(100)
+        self.assertEqual(set(result.makespans.tolist()), set([9 * 60 * 1000]))
+        self.assertEqual(result.makespan_percentiles[99], 9 * 60 * 1000)
+    def test_empirical_durations(self):
+        self.comps['c'][DependencyGraph.START_DISTRIBUTION_KEY] = \
+            DependencySchedule.EmpiricalDistribution([timedelta(minutes=1),
+                                                      timedelta(minutes=10)])
+        result = self.simulation(seed=1).run(1000, percentiles=(1, 99))
+        self.assertEqual(set(result.makespans.tolist()),
+                         set([7 * 60 * 1000, 15 * 60 * 1000]))
+        self.assertEqual(result.makespan_percentiles, {1: 7 * 60 * 1000,
+                                                       99: 15 * 60 * 1000})
+    def test_lognormal_durations(self):
+        self.comps['d'][DependencyGraph.STOP_DISTRIBUTION_KEY] = \
+            DependencySchedule.LognormalDistribution(timedelta(minutes=8), 0.5)
+        shutdown = DependencyGraph.DependencyDirection.SHUTDOWN
+        result = self.simulation(seed=2).run(500, shutdown, max_component_samples=300)
+        self.assertEqual(result.readiness_percentiles.shape, (4, 3))
+        self.assertEqual(result.num_component_samples, 300)
+        percentiles = [result.makespan_percentiles[p] for p in (50, 95, 99)]
+        self.assertEqual(percentiles, sorted(percentiles))
+        self.assertTrue(abs(percentiles[0] - 13 * 60 * 1000) < 60 * 1000)
+        repeated = self.simulation(seed=2).run(500, shutdown)
+        self.assertTrue((result.makespans == repeated.makespans).all())
+    def test_criticality_index(self):
+        result = self.simulation().run(10)
+        self.assertTrue(result.criticality_index is None)
+        result = self.simulation().run(10, with_criticality=True)
+        self.assertEqual(result.criticality_index.tolist(), [1.0, 0.0, 1.0, 1.0])
+        self.comps['c'][DependencyGraph.START_DISTRIBUTION_KEY] = \
+            DependencySchedule.EmpiricalDistribution([timedelta(minutes=1),
+                                                      timedelta(minutes=10)])
+        result = self.simulation(seed=3).run(1000, with_criticality=True)
+        index = result.criticality_index
+        self.assertEqual(index[0], 1.0)
+        self.assertEqual(index[1] + index[2], 1.0)
+        self.assertTrue(0.4 < index[1] < 0.6)
+    def test_no_samples(self):
+        self.assertRaises(ValueError, self.simulation().run, 0)
+
+if __name__=='__main__':
+    unittest.main()